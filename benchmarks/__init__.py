@@ -0,0 +1,9 @@
+"""
+Benchmarks for the To-Do List Manager's hot paths.
+- workload generates synthetic todo_data.json files (1k to 1M tasks) with configurable
+  priority, due date, completion, deletion and text length distributions.
+- bench times loading, saving, id allocation, selected-task lookup and the
+  filter/sort/render step of a refresh, and reports JSON results.
+
+Run from the project folder: python -m benchmarks --sizes 1000,100000 --output results.json
+"""
@@ -0,0 +1,42 @@
+"""Command line: python -m benchmarks [options]; see --help."""
+
+import argparse
+import sys
+
+from benchmarks.bench import dump, format_table, run_all
+from benchmarks.workload import WorkloadSpec, parse_range, parse_weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time the To-Do List Manager's hot paths on synthetic task files.")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated task counts (default: %(default)s; up to 1000000)")
+    parser.add_argument("--backend", default="journal", choices=("json", "journal", "sqlite"))
+    parser.add_argument("--repeat", type=int, default=5, help="samples of whole-file operations")
+    parser.add_argument("--samples", type=int, default=1000, help="samples of per-task operations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--priorities", default="High=0.2,Medium=0.5,Low=0.3", help="priority weights")
+    parser.add_argument("--completed", type=float, default=0.3, help="fraction of completed tasks")
+    parser.add_argument("--deleted", type=float, default=0.02, help="fraction of soft-deleted tasks")
+    parser.add_argument("--due", type=float, default=0.7, help="fraction of tasks with a due date")
+    parser.add_argument("--overdue", type=float, default=0.25, help="fraction of due dates in the past")
+    parser.add_argument("--invalid-due", type=float, default=0.0, help="fraction of due dates that do not parse")
+    parser.add_argument("--words", default="2-10", help="words per task text, as MIN-MAX")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory runs")
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    parser.add_argument("--output", help="write the JSON report here and print a table instead")
+    args = parser.parse_args(argv)
+
+    spec = WorkloadSpec(parse_weights(args.priorities), args.completed, args.deleted, args.due, args.overdue,
+                        args.invalid_due, parse_range(args.words))
+    sizes = [int(n) for n in args.sizes.split(',')]
+    report = run_all(sizes, args.backend, spec, args.seed, args.repeat, args.samples,
+                     memory=not args.no_memory, keep=args.keep)
+    text = dump(report, args.output)
+    print(format_table(report) if args.output else text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
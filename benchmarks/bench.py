@@ -0,0 +1,195 @@
+"""
+Timing runs over the TaskStore hot paths.
+- Each operation is run several times; every run is one latency sample. Results give
+  throughput (operations per second, and tasks per second for whole-file operations),
+  p50/p99 latency and, unless disabled, the peak memory traced during one extra run.
+- The refresh step is TaskStore.query plus todo_task.build_row for the rows the Treeview
+  would actually hold; the Tk calls themselves are not timed (no display is needed).
+"""
+
+import json
+import platform
+import random
+import shutil
+import tempfile
+import tracemalloc
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.workload import WorkloadSpec, generate_tasks, write_task_file
+from todo_index import FILTERS
+from todo_storage import LOAD_BATCH
+from todo_store import TaskStore
+from todo_task import VIRTUAL_LIST_MIN_ROWS, VIRTUAL_OVERSCAN, build_row
+
+PAGE_ROWS = 25   # Treeview rows on screen when the list is windowed
+BULK_SELECTION = 100   # tasks selected for the bulk variant of get_selected
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))]
+
+
+def timed(fn, samples):
+    times = []
+    for _ in range(samples):
+        start = perf_counter()
+        fn()
+        times.append(perf_counter() - start)
+    return times
+
+
+def peak_memory(fn):
+    """Peak bytes allocated by Python while fn runs."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(op, size, times, tasks_per_op=None, peak=None):
+    total = sum(times)
+    result = {"op": op, "tasks": size, "samples": len(times), "total_s": round(total, 6),
+              "ops_per_s": round(len(times) / total, 1) if total else None,
+              "p50_ms": round(percentile(times, 50) * 1000, 4),
+              "p99_ms": round(percentile(times, 99) * 1000, 4),
+              "peak_bytes": peak}
+    if tasks_per_op is not None:
+        result["tasks_per_s"] = round(tasks_per_op * len(times) / total, 1) if total else None
+    return result
+
+
+class Bench:
+    """Benchmarks for one generated data file of a given size."""
+
+    def __init__(self, size, backend="journal", spec=None, seed=0, repeat=5, samples=1000,
+                 memory=True, workdir=None):
+        self.size = size
+        self.backend = backend
+        self.spec = spec or WorkloadSpec()
+        self.seed = seed
+        self.repeat = repeat
+        self.samples = samples
+        self.memory = memory
+        self.workdir = Path(workdir or tempfile.mkdtemp(prefix="todo-bench-"))
+        self.path = self.workdir / f"todo_data_{size}.json"
+
+    def measure(self, op, fn, samples, tasks_per_op=None):
+        fn()   # warm-up: caches, the SQLite migration, file system buffers
+        times = timed(fn, samples)
+        peak = peak_memory(fn) if self.memory else None
+        return summarize(op, self.size, times, tasks_per_op, peak)
+
+    def run(self):
+        write_task_file(self.path, generate_tasks(self.size, self.spec, self.seed))
+        results = [self.measure("load", self.load, self.repeat, self.size)]
+        self.first_batch()   # warm-up
+        # no peak memory here: the loader thread keeps allocating after the sample ends
+        results.append(summarize("first_batch", self.size, [self.first_batch() for _ in range(self.repeat)]))
+
+        store = TaskStore(self.path, self.backend)
+        store.load()
+        try:
+            results.append(self.measure("save", store.save, self.repeat, self.size))
+            results.append(self.measure("next_id", store.ids.allocate, self.samples))
+            rng = random.Random(self.seed)
+            ids = list(store.task_index)
+            # the selection is a set of ids, as in TodoApp.get_selected_tasks
+            results.append(self.measure("get_selected", lambda: store.get_many({rng.choice(ids)}),
+                                        self.samples))
+            bulk = min(BULK_SELECTION, len(ids))
+            results.append(self.measure("get_selected_bulk", lambda: store.get_many(set(rng.sample(ids, bulk))),
+                                        self.samples, bulk))
+            results.append(self.refresh(store))
+        finally:
+            store.close()
+        return results
+
+    def load(self):
+        store = TaskStore(self.path, self.backend)
+        store.load()
+        store.close()
+
+    def first_batch(self):
+        """Seconds until a streaming load has its first batch of tasks indexed."""
+        start = perf_counter()
+        store = TaskStore(self.path, self.backend)
+        store.begin_load()
+        store.load_some(wait=True, max_tasks=LOAD_BATCH)
+        elapsed = perf_counter() - start
+        store.finish_load()   # let the loader thread finish before the file is touched again
+        store.close()
+        return elapsed
+
+    def refresh(self, store):
+        """Every Filter button with no search, a common word and a rare word prefix."""
+        # counted over a sorted list, so ties go the same way in every run
+        ranked = Counter(sorted(w for t in store.tasks[:200] for w in t.text.lower().split())).most_common()
+        common = ranked[0][0] if ranked else ""
+        rare = ranked[-1][0][:3] if ranked else ""
+        cases = [(f, s) for f in FILTERS for s in ("", common, rare)]
+        today = date.today().toordinal()
+
+        def render(f, s):
+            visible = store.query(f, s)
+            if len(visible) > VIRTUAL_LIST_MIN_ROWS:
+                visible = visible[:PAGE_ROWS + VIRTUAL_OVERSCAN]
+            for t in visible:
+                build_row(t, today)
+
+        def step():
+            for f, s in cases:
+                render(f, s)
+
+        step()
+        # one sample per filter/search combination
+        times = []
+        for _ in range(self.repeat):
+            for f, s in cases:
+                start = perf_counter()
+                render(f, s)
+                times.append(perf_counter() - start)
+        peak = peak_memory(step) if self.memory else None
+        return summarize("refresh", self.size, times, peak=peak)
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def run_all(sizes, backend="journal", spec=None, seed=0, repeat=5, samples=1000, memory=True, keep=False):
+    """Benchmark every size; returns the report as a JSON-serializable dict."""
+    spec = spec or WorkloadSpec()
+    report = {"started": datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "backend": backend, "seed": seed, "repeat": repeat, "samples": samples,
+              "workload": spec.as_dict(), "results": []}
+    for size in sizes:
+        bench = Bench(size, backend, spec, seed, repeat, samples, memory)
+        try:
+            report["results"].extend(bench.run())
+        finally:
+            if not keep:
+                bench.cleanup()
+    return report
+
+
+def format_table(report):
+    lines = [f"{'op':<18}{'tasks':>9}{'ops/s':>12}{'tasks/s':>12}{'p50 ms':>11}{'p99 ms':>11}{'peak KiB':>11}"]
+    for r in report["results"]:
+        peak = "" if r["peak_bytes"] is None else f"{r['peak_bytes'] / 1024:.0f}"
+        lines.append(f"{r['op']:<18}{r['tasks']:>9}{r['ops_per_s'] or 0:>12.1f}{r.get('tasks_per_s') or '':>12}"
+                     f"{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{peak:>11}")
+    return "\n".join(lines)
+
+
+def dump(report, path=None):
+    text = json.dumps(report, indent=2)
+    if path:
+        Path(path).write_text(text + "\n", encoding='utf-8')
+    return text
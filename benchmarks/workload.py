@@ -0,0 +1,99 @@
+"""
+Synthetic task files for benchmarking.
+- WorkloadSpec holds the distributions (priority mix, completed/deleted/due-date ratios,
+  words per task text); generate_tasks draws n tasks in the todo_data.json schema from it.
+- Task texts use a fixed vocabulary with Zipf-like word frequencies, so a few words are
+  very common and most are rare, as in real task lists (and in search queries).
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+from todo_storage import JsonStorage, TIMESTAMP_FORMAT
+
+VOCABULARY_SIZE = 2000
+SYLLABLES = ("ka", "po", "ri", "mu", "te", "sa", "lo", "ne", "vi", "da", "gu", "che", "ban", "tor", "mil")
+
+
+def parse_weights(text):
+    """Parse "High=0.2,Medium=0.5,Low=0.3" into a dict."""
+    weights = {}
+    for part in text.split(','):
+        name, _, value = part.partition('=')
+        weights[name.strip()] = float(value)
+    return weights
+
+
+def parse_range(text):
+    """Parse "2-10" (or "5") into a (low, high) tuple of ints."""
+    low, _, high = text.partition('-')
+    return int(low), int(high or low)
+
+
+class WorkloadSpec:
+    """Distributions for generate_tasks; ratios are probabilities per task."""
+
+    def __init__(self, priorities=None, completed=0.3, deleted=0.02, due=0.7, overdue=0.25,
+                 invalid_due=0.0, words=(2, 10), history_days=365):
+        self.priorities = priorities or {"High": 0.2, "Medium": 0.5, "Low": 0.3}
+        self.completed = completed        # completed tasks
+        self.deleted = deleted            # tombstones (soft-deleted tasks)
+        self.due = due                    # tasks with a due date
+        self.overdue = overdue            # of those, due date already past
+        self.invalid_due = invalid_due    # of those, a due date that does not parse
+        self.words = words                # (min, max) words per task text
+        self.history_days = history_days  # created timestamps spread over this many past days
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def vocabulary(rng, size=VOCABULARY_SIZE):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+def generate_tasks(n, spec=None, seed=0, today=None):
+    """Return n task dicts (ids "1".."n") drawn from spec; the same seed gives the same tasks."""
+    spec = spec or WorkloadSpec()
+    rng = random.Random(seed)
+    today = today or date.today()
+    now = datetime.combine(today, datetime.min.time())
+    words = vocabulary(rng)
+    word_weights = [1 / (rank + 1) for rank in range(len(words))]
+    names = list(spec.priorities)
+    priority_weights = [spec.priorities[p] for p in names]
+    # drawing everything up front keeps the per-task loop to cheap list indexing
+    priorities = rng.choices(names, priority_weights, k=n)
+    text_words = rng.choices(words, word_weights, k=n * spec.words[1])
+
+    tasks = []
+    for i in range(n):
+        count = rng.randint(*spec.words)
+        base = i * spec.words[1]
+        text = " ".join(text_words[base:base + count]).capitalize()
+        due = None
+        if rng.random() < spec.due:
+            if rng.random() < spec.invalid_due:
+                due = "someday"
+            elif rng.random() < spec.overdue:
+                due = (today - timedelta(days=rng.randint(1, 90))).isoformat()
+            else:
+                due = (today + timedelta(days=rng.randint(0, 180))).isoformat()
+        created = now - timedelta(minutes=rng.randint(0, spec.history_days * 1440))
+        task = {"id": str(i + 1), "text": text, "priority": priorities[i], "due_date": due,
+                "completed": rng.random() < spec.completed, "created": created.strftime(TIMESTAMP_FORMAT),
+                "deleted": rng.random() < spec.deleted}
+        if task["deleted"]:
+            task["deleted_at"] = (created + timedelta(days=1)).strftime(TIMESTAMP_FORMAT)
+        tasks.append(task)
+    return tasks
+
+
+def write_task_file(path, tasks):
+    """Write tasks as a todo_data.json snapshot, with next_id set past the highest id."""
+    storage = JsonStorage(path, backups=0)
+    storage.meta = {"next_id": len(tasks) + 1}
+    storage.save_all(tasks)
@@ -0,0 +1,114 @@
+"""TodoApp's Treeview bookkeeping, run against a fake tree (no display needed)."""
+
+import random
+import unittest
+from types import SimpleNamespace
+
+try:
+    import todo_app
+except ImportError:   # tkinter is not installed
+    todo_app = None
+
+
+class FakeTree:
+    """The Treeview calls reconcile_tree makes, on a plain list of item ids."""
+
+    def __init__(self):
+        self.children = []
+        self.detached = set()
+        self.data = {}
+        self.calls = []
+
+    def delete(self, *iids):
+        self.calls.append("delete")
+        for iid in iids:
+            self.children.remove(iid)
+            del self.data[iid]
+
+    def detach(self, *iids):
+        self.calls.append("detach")
+        for iid in iids:
+            self.children.remove(iid)
+            self.detached.add(iid)
+
+    def insert(self, parent, index, iid, values, tags):
+        self.calls.append("insert")
+        assert iid not in self.data
+        self.children.insert(len(self.children) if index == "end" else index, iid)
+        self.data[iid] = (values, tags)
+
+    def move(self, iid, parent, index):
+        self.calls.append("move")
+        self.detached.remove(iid)
+        self.children.insert(index, iid)
+
+    def item(self, iid, values, tags):
+        self.calls.append("item")
+        self.data[iid] = (values, tags)
+
+
+@unittest.skipIf(todo_app is None, "tkinter is not available")
+class LongestIncreasingRunTest(unittest.TestCase):
+    def test_indices_form_a_longest_increasing_run(self):
+        rng = random.Random(0)
+        for n in range(0, 40):
+            seq = rng.sample(range(100), n)
+            run = sorted(todo_app.longest_increasing_run(seq))
+            values = [seq[i] for i in run]
+            self.assertEqual(values, sorted(set(values)))
+            # brute force length of the longest increasing subsequence
+            best = [1] * n
+            for i in range(n):
+                for j in range(i):
+                    if seq[j] < seq[i]:
+                        best[i] = max(best[i], best[j] + 1)
+            self.assertEqual(len(run), max(best, default=0))
+
+    def test_sorted_input_is_one_run(self):
+        self.assertEqual(todo_app.longest_increasing_run([1, 2, 3]), {0, 1, 2})
+        self.assertEqual(len(todo_app.longest_increasing_run([3, 2, 1])), 1)
+
+
+@unittest.skipIf(todo_app is None, "tkinter is not available")
+class ReconcileTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleNamespace(tree=FakeTree(), rendered_rows={}, rendered_order=[])
+
+    def reconcile(self, rows):
+        self.app.tree.calls.clear()
+        todo_app.TodoApp.reconcile_tree(self.app, rows)
+        self.assertEqual(self.app.tree.children, [iid for iid, _, _ in rows])
+        self.assertEqual(self.app.tree.data, {iid: (values, tags) for iid, values, tags in rows})
+        self.assertEqual(self.app.tree.detached, set())
+        return self.app.tree.calls
+
+    @staticmethod
+    def rows(ids, version=0):
+        return [(iid, (iid, f"text {version}"), ()) for iid in ids]
+
+    def test_unchanged_rows_cost_no_tree_calls(self):
+        self.reconcile(self.rows("abcde"))
+        self.assertEqual(self.reconcile(self.rows("abcde")), [])
+
+    def test_only_changed_rows_are_updated(self):
+        self.reconcile(self.rows("abcde"))
+        rows = self.rows("abcde")
+        rows[2] = ("c", ("c", "edited"), ("completed",))
+        self.assertEqual(self.reconcile(rows), ["item"])
+
+    def test_one_moved_row_is_one_move(self):
+        self.reconcile(self.rows("abcde"))
+        self.assertEqual(self.reconcile(self.rows("bcdae")), ["detach", "move"])
+
+    def test_random_edits_reach_the_target_order(self):
+        rng = random.Random(1)
+        ids = [str(i) for i in range(30)]
+        for version in range(60):
+            target = rng.sample(ids, rng.randint(0, len(ids)))
+            if rng.random() < 0.5:
+                target.sort(key=int)
+            self.reconcile(self.rows(target, version % 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""ColumnarTasks against the row-oriented indexes, with and without NumPy."""
+
+import random
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+import todo_columns
+from todo_index import TaskStats
+from todo_store import TaskStore
+
+TODAY = date(2024, 6, 1)
+
+
+class ColumnarTasksTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = TaskStore(Path(tmp.name) / "todo_data.json", "journal", columnar=True)
+        self.store.load()
+        self.addCleanup(self.store.close)
+        rng = random.Random(0)
+        tasks = [self.store.add(f"task {i}", rng.choice(["High", "Medium", "Low", "Urgent"]),
+                                rng.choice([None, "2024-05-01", "2024-06-01", "2024-07-01", "bad"]))
+                 for i in range(300)]
+        self.store.update_many(tasks[:100:3], "Mark complete", completed=True)
+        self.store.update_many(tasks[50:80], "Set priority", priority="High")
+        self.store.delete(tasks[200:260])
+        self.store.undo()
+        self.store.delete(tasks[100:130])
+
+    def numpy_modes(self):
+        modes = [False] + ([True] if todo_columns.NUMPY_AVAILABLE else [])
+        for use_numpy in modes:
+            with self.subTest(numpy=use_numpy), mock.patch.object(todo_columns, "NUMPY_AVAILABLE", use_numpy):
+                yield
+
+    def assert_matches_indexes(self):
+        columns, store = self.store.columns, self.store
+        self.assertEqual(len(columns), len(store.tasks))
+        expected = TaskStats(store.tasks).snapshot(TODAY)
+        for _ in self.numpy_modes():
+            stats = columns.stats(TODAY.toordinal())
+            stats["by_priority"] = {p: n for p, n in stats["by_priority"].items() if n}
+            expected["by_priority"] = {p: n for p, n in expected["by_priority"].items()
+                                       if p in todo_columns.PRIORITY_CODES}
+            self.assertEqual(stats, expected)
+            self.assertEqual(set(columns.select_ids(completed=True)), store.filters.members("Completed"))
+            self.assertEqual(set(columns.select_ids(completed=False)), store.filters.members("Pending"))
+            for priority in ("High", "Medium", "Low"):
+                self.assertEqual(set(columns.select_ids(priority=priority)),
+                                 store.filters.members(f"{priority} Priority"))
+            due = {t.id for t in store.tasks if t.due_ord and date(2024, 5, 15).toordinal() <= t.due_ord
+                   < date(2024, 6, 15).toordinal()}
+            self.assertEqual(set(columns.select_ids(due_from=date(2024, 5, 15).toordinal(),
+                                                    due_before=date(2024, 6, 15).toordinal())), due)
+
+    def test_columns_agree_with_stats_and_filter_buckets(self):
+        self.assert_matches_indexes()
+
+    def test_compaction_drops_deleted_rows(self):
+        self.assertGreater(len(self.store.columns.task_ids), len(self.store.tasks))
+        self.store.compact()
+        columns = self.store.columns
+        self.assertEqual(len(columns.task_ids), len(self.store.tasks))
+        self.assertEqual(sum(columns.deleted), 0)
+        self.assertEqual(columns.rows, {task_id: row for row, task_id in enumerate(columns.task_ids)})
+        self.assert_matches_indexes()
+        # rows are reused and appended as usual afterwards
+        t = self.store.add("after compaction", "High")
+        self.store.toggle(self.store.tasks[0])
+        self.assertEqual(columns.task_ids[-1], t.id)
+        self.assert_matches_indexes()
+
+    def test_store_queries_are_the_same_with_and_without_columns(self):
+        criteria = [{}, {"completed": True}, {"priority": "High", "completed": False},
+                    {"priority": "Urgent"}, {"due_before": TODAY.toordinal()},
+                    {"due_from": TODAY.toordinal(), "completed": False}]
+        for _ in self.numpy_modes():
+            for c in criteria:
+                with_columns = (self.store.count(**c), self.store.select(**c))
+                columns, self.store.columns = self.store.columns, None
+                try:
+                    self.assertEqual((self.store.count(**c), self.store.select(**c)), with_columns, c)
+                finally:
+                    self.store.columns = columns
+
+
+if __name__ == "__main__":
+    unittest.main()
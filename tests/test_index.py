@@ -0,0 +1,59 @@
+"""In-memory indexes checked against brute force."""
+
+import random
+import unittest
+
+from todo_index import SortedTasks
+from todo_task import Task
+
+
+class SortedTasksTest(unittest.TestCase):
+    def make_task(self, rng, n):
+        return Task(str(n), f"task {n}", rng.choice(["High", "Medium", "Low"]),
+                    rng.choice([None, "2024-01-01", "2024-06-30", "2025-12-31"]),
+                    completed=rng.random() < 0.3, created=f"2024-01-{rng.randint(1, 28):02d} 09:00")
+
+    def assert_order(self, order, tasks):
+        expected = [t.id for t in sorted(tasks, key=SortedTasks.sort_key)]
+        self.assertEqual(list(order), expected)
+        self.assertEqual(len(order), len(tasks))
+        self.assertEqual(order.maxes, [chunk[-1] for chunk in order.chunks])
+        self.assertTrue(all(0 < len(chunk) <= 2 * SortedTasks.CHUNK for chunk in order.chunks))
+
+    def test_adds_split_chunks_and_removes_drop_them(self):
+        rng = random.Random(0)
+        tasks = {}
+        order = SortedTasks()
+        for n in range(5 * SortedTasks.CHUNK):
+            t = tasks[n] = self.make_task(rng, n)
+            order.add(t)
+        self.assertGreater(len(order.chunks), 2)
+        self.assert_order(order, tasks.values())
+
+        # change keys in place (remove, edit, add back) and delete most of the tasks
+        for n in rng.sample(sorted(tasks), 500):
+            t = tasks[n]
+            order.remove(t)
+            t.completed = not t.completed
+            t.priority = rng.choice(["High", "Medium", "Low"])
+            order.add(t)
+        self.assert_order(order, tasks.values())
+        for n in rng.sample(sorted(tasks), len(tasks) - 10):
+            order.remove(tasks.pop(n))
+        self.assert_order(order, tasks.values())
+        for t in list(tasks.values()):
+            order.remove(t)
+        self.assertEqual((order.chunks, order.maxes, len(order)), ([], [], 0))
+
+    def test_bulk_build_matches_incremental_adds(self):
+        rng = random.Random(1)
+        tasks = [self.make_task(rng, n) for n in range(3 * SortedTasks.CHUNK + 7)]
+        built = SortedTasks(tasks)
+        self.assert_order(built, tasks)
+        extra = self.make_task(rng, len(tasks))
+        built.add(extra)
+        self.assert_order(built, tasks + [extra])
+
+
+if __name__ == "__main__":
+    unittest.main()
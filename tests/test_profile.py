@@ -0,0 +1,78 @@
+"""Timing instrumentation: rolling histograms and the profiler."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from todo_profile import BUCKET_BOUNDS_MS, Profiler, RollingHistogram
+
+
+class RollingHistogramTest(unittest.TestCase):
+    def test_window_evicts_the_oldest_samples_from_the_buckets(self):
+        hist = RollingHistogram(size=3)
+        for seconds in (0.00005, 0.002, 0.002, 2.0):   # 0.05 ms drops out of the window
+            hist.add(seconds)
+        self.assertEqual(list(hist.samples), [0.002, 0.002, 2.0])
+        self.assertEqual(sum(hist.buckets), 3)
+        self.assertEqual(hist.buckets[0], 0)
+        self.assertEqual(hist.buckets[RollingHistogram.bucket(0.002)], 2)
+        self.assertEqual(hist.buckets[len(BUCKET_BOUNDS_MS)], 1)   # slower than every bound
+        # lifetime totals still count the evicted sample
+        self.assertEqual(hist.count, 4)
+        self.assertAlmostEqual(hist.total, 2.00405)
+
+    def test_nearest_rank_percentiles(self):
+        hist = RollingHistogram()
+        self.assertEqual(hist.percentile(50), 0.0)
+        for ms in range(100, 0, -1):
+            hist.add(ms / 1000)
+        self.assertEqual(hist.percentile(50), 0.05)
+        self.assertEqual(hist.percentile(99), 0.099)
+        self.assertEqual(hist.percentile(100), 0.1)
+        self.assertEqual(hist.percentile(0), 0.001)
+        snap = hist.snapshot()
+        self.assertEqual((snap["count"], snap["last_s"], snap["max_s"]), (100, 0.001, 0.1))
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_measure_and_wrap_record_under_the_name(self):
+        profiler = Profiler()
+        with profiler.measure("op"):
+            pass
+        timed = profiler.wrap("fn", lambda x: x * 2)
+        self.assertEqual(timed(21), 42)
+        with self.assertRaises(ZeroDivisionError):
+            profiler.wrap("fn", lambda: 1 / 0)()
+        self.assertEqual({name: s["count"] for name, s in profiler.snapshot().items()}, {"op": 1, "fn": 2})
+        self.assertIn("fn", profiler.report())
+
+    def test_disabled_profiler_records_nothing(self):
+        profiler = Profiler(enabled=False)
+        with profiler.measure("op"):
+            pass
+        self.assertEqual(profiler.wrap("fn", lambda: 1)(), 1)
+        self.assertEqual(profiler.snapshot(), {})
+
+    def test_profile_next_dumps_only_the_next_call(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "todo_profile_fn.prof"
+            profiler = Profiler()
+            timed = profiler.wrap("fn", lambda: sorted(range(1000)))
+            profiler.wrap("other", lambda: None)()
+            profiler.profile_next("fn", path)
+            profiler.wrap("other", lambda: None)()   # another operation does not use it up
+            self.assertIsNotNone(profiler.armed)
+            timed()
+            self.assertIsNone(profiler.armed)
+            self.assertTrue(path.exists())
+            name, dumped, text = profiler.last_profile
+            self.assertEqual((name, dumped), ("fn", path))
+            self.assertIn("function calls", text)
+            path.unlink()
+            timed()
+            self.assertFalse(path.exists())
+            self.assertEqual(profiler.snapshot()["fn"]["count"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,344 @@
+"""Storage engines: atomic snapshots and their backups, the journal, streaming reads and
+the background writer; the compaction policy and the id allocator."""
+
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from todo_storage import (BackgroundStorage, CompactionPolicy, IdAllocator, JournalStorage, JsonStorage,
+                          JsonStream, make_storage)
+
+
+def task(task_id, text="task", **fields):
+    return dict({"id": str(task_id), "text": text, "priority": "Medium", "due_date": None,
+                 "completed": False, "created": "2024-01-01 09:00", "deleted": False}, **fields)
+
+
+class StorageTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.path = self.dir / "todo_data.json"
+
+
+class RoundTripTest(StorageTestCase):
+    def test_every_backend_reads_back_what_it_wrote(self):
+        tasks = [task(1, "Write report", extra_key=[1, 2]), task(2, "ünïcode", completed=True),
+                 task(3, "gone", deleted=True, deleted_at="2024-01-02 10:00")]
+        for kind in ("json", "journal", "sqlite"):
+            with self.subTest(kind=kind):
+                path = self.dir / kind / "todo_data.json"
+                path.parent.mkdir()
+                storage = make_storage(kind, path)
+                storage.load()
+                storage.set_meta("next_id", 4)   # a plain JSON file writes it with the snapshot
+                storage.save_all(tasks)
+                if storage.incremental:
+                    storage.append([task(2, "changed")])
+                storage.close()
+
+                storage = make_storage(kind, path)
+                loaded = {t["id"]: t for t in storage.load()}
+                storage.close()
+                self.assertEqual(storage.meta["next_id"], 4)
+                self.assertEqual(loaded["1"]["extra_key"], [1, 2])
+                self.assertEqual(loaded["2"]["text"], "changed" if storage.incremental else "ünïcode")
+                self.assertTrue(loaded["3"]["deleted"])
+
+    def test_bare_list_file_still_loads(self):
+        self.path.write_text(json.dumps([task(1)]), encoding="utf-8")
+        self.assertEqual(JsonStorage(self.path).load(), [task(1)])
+
+
+class SnapshotTest(StorageTestCase):
+    def test_save_rotates_backups_and_leaves_no_temp_file(self):
+        storage = JsonStorage(self.path, backups=2)
+        for n in range(1, 5):
+            storage.save_all([task(n)])
+        self.assertFalse(self.path.with_name("todo_data.json.tmp").exists())
+        self.assertEqual(json.loads(self.path.read_text())["tasks"], [task(4)])
+        self.assertEqual(json.loads(storage.backup_path(1).read_text())["tasks"], [task(3)])
+        self.assertEqual(json.loads(storage.backup_path(2).read_text())["tasks"], [task(2)])
+        self.assertFalse(storage.backup_path(3).exists())
+
+    def test_damaged_snapshot_falls_back_to_newest_backup(self):
+        storage = JsonStorage(self.path)
+        storage.save_all([task(1)])
+        storage.save_all([task(1), task(2)])
+        self.path.write_text('{"meta": {}, "tasks": [{"id": "1"', encoding="utf-8")
+
+        storage = JsonStorage(self.path)
+        self.assertEqual(storage.load(), [task(1)])
+        self.assertEqual(storage.recovered_from, storage.backup_path(1))
+
+        # the next save sets the damaged file aside instead of rotating it into the backups
+        storage.save_all([task(1), task(3)])
+        self.assertTrue(self.path.with_name("todo_data.json.damaged").exists())
+        self.assertEqual(json.loads(storage.backup_path(1).read_text())["tasks"], [task(1)])
+        self.assertEqual(JsonStorage(self.path).load(), [task(1), task(3)])
+
+    def test_crash_before_the_new_snapshot_is_renamed_into_place(self):
+        storage = JsonStorage(self.path)
+        storage.save_all([task(1)])
+        storage.save_all([task(1), task(2)])
+        real_replace = os.replace
+
+        def crash(src, dst):
+            if Path(src) == storage.tmp_path:
+                raise OSError("power cut")
+            real_replace(src, dst)
+
+        with mock.patch("todo_storage.os.replace", crash), self.assertRaises(OSError):
+            storage.save_all([task(1), task(2), task(3)])
+        # the last completed save is still the snapshot, with the one before it as .1
+        storage = JsonStorage(self.path)
+        self.assertEqual(storage.load(), [task(1), task(2)])
+        self.assertIsNone(storage.recovered_from)
+        self.assertEqual(json.loads(storage.backup_path(1).read_text())["tasks"], [task(1), task(2)])
+        self.assertEqual(json.loads(storage.backup_path(2).read_text())["tasks"], [task(1)])
+
+    def test_complete_temp_file_without_snapshot_is_finished(self):
+        storage = JsonStorage(self.path)
+        storage.save_all([task(1)])
+        self.path.rename(storage.backup_path(1))
+        storage.tmp_path.write_text(json.dumps({"meta": {}, "tasks": [task(1), task(2)]}), encoding="utf-8")
+        storage = JsonStorage(self.path)
+        self.assertEqual(storage.load(), [task(1), task(2)])
+        self.assertIsNone(storage.recovered_from)
+        self.assertFalse(storage.tmp_path.exists())
+
+        # a temporary file cut off mid-write is ignored in favour of the backups
+        self.path.rename(storage.backup_path(1))
+        storage.tmp_path.write_text('{"meta": {}, "tasks": [', encoding="utf-8")
+        storage = JsonStorage(self.path)
+        self.assertEqual(storage.load(), [task(1), task(2)])
+        self.assertEqual(storage.recovered_from, storage.backup_path(1))
+
+    def test_unreadable_snapshot_without_backups_raises(self):
+        self.path.write_text("not json", encoding="utf-8")
+        with self.assertRaises(ValueError):
+            JsonStorage(self.path).load()
+
+
+class JournalTest(StorageTestCase):
+    def test_replay_applies_later_versions_and_meta(self):
+        storage = JournalStorage(self.path)
+        storage.save_all([task(1), task(2)])
+        storage.append([task(2, "edited")])
+        storage.append([task(3), task(4)])
+        storage.set_meta("next_id", 5)
+        storage.close()
+
+        storage = JournalStorage(self.path)
+        self.assertEqual([t["text"] for t in storage.load()], ["task", "edited", "task", "task"])
+        self.assertEqual(storage.meta["next_id"], 5)
+        self.assertEqual(storage.journal_records, 4)   # a two-task "puts" line counts twice
+
+    def test_torn_last_line_is_dropped_and_truncated(self):
+        storage = JournalStorage(self.path)
+        storage.save_all([])
+        storage.append([task(1)])
+        storage.append([task(2), task(3)])
+        storage.close()
+        good_size = storage.journal_path.stat().st_size
+        with open(storage.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "task": {"id": "4", "te')
+
+        storage = JournalStorage(self.path)
+        self.assertEqual([t["id"] for t in storage.load()], ["1", "2", "3"])
+        self.assertEqual(storage.journal_path.stat().st_size, good_size)
+        storage.append([task(5)])
+        storage.close()
+        self.assertEqual([t["id"] for t in JournalStorage(self.path).load()], ["1", "2", "3", "5"])
+
+    def test_checkpoint_empties_the_journal(self):
+        storage = JournalStorage(self.path, checkpoint_every=2)
+        storage.append([task(1)])
+        self.assertFalse(storage.needs_checkpoint())
+        storage.append([task(2)])
+        self.assertTrue(storage.needs_checkpoint())
+        storage.save_all(storage.load())
+        self.assertEqual(storage.journal_path.stat().st_size, 0)
+        self.assertFalse(storage.needs_checkpoint())
+        storage.close()
+        self.assertEqual([t["id"] for t in JournalStorage(self.path).load()], ["1", "2"])
+
+
+class CompactionPolicyTest(unittest.TestCase):
+    NOW = datetime(2024, 3, 31, 12, 0)
+    RECENT = "2024-03-30 12:00"
+
+    def test_no_tombstones_never_compacts(self):
+        self.assertFalse(CompactionPolicy().should_compact(100, [], now=self.NOW))
+
+    def test_tombstone_count(self):
+        policy = CompactionPolicy(max_tombstones=3, max_ratio=None, max_age_days=None)
+        self.assertFalse(policy.should_compact(0, [self.RECENT] * 2, now=self.NOW))
+        self.assertTrue(policy.should_compact(0, [self.RECENT] * 3, now=self.NOW))
+
+    def test_ratio_needs_a_minimum_of_tombstones(self):
+        policy = CompactionPolicy(max_tombstones=None, max_ratio=0.25, max_age_days=None, min_tombstones=4)
+        self.assertFalse(policy.should_compact(1, [self.RECENT] * 3, now=self.NOW))   # 75%, but only 3
+        self.assertFalse(policy.should_compact(13, [self.RECENT] * 4, now=self.NOW))  # 4 of 17
+        self.assertTrue(policy.should_compact(12, [self.RECENT] * 4, now=self.NOW))   # 4 of 16
+
+    def test_age(self):
+        policy = CompactionPolicy(max_tombstones=None, max_ratio=None, max_age_days=30)
+        self.assertFalse(policy.should_compact(10, [self.RECENT, "2024-03-02 12:01"], now=self.NOW))
+        self.assertTrue(policy.should_compact(10, [self.RECENT, "2024-03-01 12:00"], now=self.NOW))
+        # a tombstone from before deleted_at was recorded counts as old
+        self.assertTrue(policy.should_compact(10, [self.RECENT, None], now=self.NOW))
+
+
+class IdAllocatorTest(StorageTestCase):
+    def test_mark_is_derived_once_from_old_data(self):
+        storage = JournalStorage(self.path)
+        ids = IdAllocator(storage, ["3", "17", "not-a-number"])
+        self.assertEqual(ids.allocate(), 18)
+        self.assertEqual(storage.meta["next_id"], 19)
+
+    def test_reserve_is_one_meta_write_and_survives_reopening(self):
+        storage = JournalStorage(self.path)
+        ids = IdAllocator(storage)
+        self.assertEqual(list(ids.reserve(5)), [1, 2, 3, 4, 5])
+        self.assertEqual(storage.journal_records, 1)
+        self.assertEqual(ids.allocate(), 6)
+        storage.close()
+
+        storage = JournalStorage(self.path)
+        storage.load()
+        # ids below the mark are never handed out again, whichever tasks still exist
+        self.assertEqual(IdAllocator(storage, ["1"]).allocate(), 7)
+        self.assertEqual(list(IdAllocator(storage).reserve(0)), [])
+
+
+class StreamingTest(StorageTestCase):
+    def test_json_stream_across_tiny_chunks(self):
+        values = [task(i, "x" * (i % 7) + '"\\,[]{}', due_date=None if i % 2 else "2024-02-29")
+                  for i in range(60)] + [12345, 1.5e10, "é", None, [], {}]
+        text = json.dumps(values, indent=1)
+        for chunk in (1, 2, 3, 7, 64):
+            with self.subTest(chunk=chunk):
+                self.assertEqual(list(JsonStream(io.StringIO(text), chunk=chunk).items()), values)
+
+    def test_iter_load_matches_load(self):
+        tasks = [task(i) for i in range(1, 23)]
+        for kind in ("json", "journal", "sqlite"):
+            with self.subTest(kind=kind):
+                path = self.dir / kind / "todo_data.json"
+                path.parent.mkdir()
+                storage = make_storage(kind, path)
+                storage.load()
+                storage.set_meta("next_id", 23)
+                storage.save_all(tasks)
+                storage.close()
+
+                storage = make_storage(kind, path)
+                streamed = [t for batch in storage.iter_load(batch_size=5) for t in batch]
+                self.assertEqual(storage.meta["next_id"], 23)
+                self.assertEqual(streamed, storage.load())
+                storage.close()
+
+    def test_iter_load_raises_on_damaged_snapshot(self):
+        self.path.write_text('{"meta": {}, "tasks": [' + json.dumps(task(1)) + ', {"id"', encoding="utf-8")
+        with self.assertRaises(ValueError):
+            for _ in JsonStorage(self.path).iter_load(batch_size=1):
+                pass
+
+
+class RecordingStorage:
+    """Engine stand-in that records the calls BackgroundStorage makes."""
+    incremental = True
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.meta = {}
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def append(self, changed):
+        self.gate.wait()
+        if self.fail:
+            raise OSError("disk full")
+        self.calls.append(("append", [t["id"] for t in changed]))
+
+    def save_all(self, tasks):
+        self.calls.append(("save_all", [t["id"] for t in tasks]))
+
+    def set_meta(self, key, value):
+        self.calls.append(("set_meta", key, value))
+
+    def compact(self, live, tombstones):
+        self.calls.append(("compact", len(live), len(tombstones)))
+
+    def close(self):
+        self.calls.append(("close",))
+
+
+class BackgroundStorageTest(unittest.TestCase):
+    def test_queued_changes_are_coalesced(self):
+        engine = RecordingStorage()
+        storage = BackgroundStorage(engine, delay=60)   # only flush() ends the coalescing wait
+        storage.append([task(1)])
+        storage.append([task(2), task(1, "newer")])
+        storage.set_meta("next_id", 3)
+        storage.flush()
+        self.assertEqual(engine.calls, [("set_meta", "next_id", 3), ("append", ["1", "2"])])
+        storage.close()
+
+    def test_save_all_supersedes_earlier_puts_and_compact_keeps_its_place(self):
+        engine = RecordingStorage()
+        storage = BackgroundStorage(engine, delay=60)
+        storage.append([task(1)])
+        storage.save_all([task(1), task(2)])
+        storage.append([task(3)])
+        storage.compact([task(1)], [task(2)])
+        storage.append([task(4)])
+        storage.close()
+        self.assertEqual(engine.calls, [("save_all", ["1", "2"]), ("append", ["3"]), ("compact", 1, 1),
+                                        ("append", ["4"]), ("close",)])
+
+    def test_query_ids_defers_to_memory_while_writes_are_pending(self):
+        engine = RecordingStorage()
+        engine.query_ids = lambda filter_name, search: ["1"]
+        engine.gate.clear()
+        storage = BackgroundStorage(engine, delay=0)
+        storage.append([task(1)])
+        self.assertIsNone(storage.query_ids("All", ""))
+        engine.gate.set()
+        storage.flush()
+        self.assertEqual(storage.query_ids("All", ""), ["1"])
+        storage.close()
+
+    def test_write_errors_are_collected_and_raised_on_close(self):
+        storage = BackgroundStorage(RecordingStorage(fail=True), delay=0)
+        storage.append([task(1)])
+        storage.flush()
+        errors = storage.take_errors()
+        self.assertEqual([str(e) for e in errors], ["disk full"])
+        self.assertEqual(storage.take_errors(), [])
+        storage.append([task(2)])
+        with self.assertRaises(OSError):
+            storage.close()
+        with self.assertRaises(RuntimeError):
+            storage.append([task(3)])
+
+    def test_timer_sees_every_write(self):
+        timings = []
+        storage = BackgroundStorage(RecordingStorage(), delay=60, timer=lambda name, s: timings.append(name))
+        storage.append([task(1)])
+        storage.compact([], [])
+        storage.close()
+        self.assertEqual(timings, ["save.write", "save.write"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+"""TaskStore: persistence through every backend, index consistency, streaming loads and undo."""
+
+import json
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from todo_index import FILTERS, SortedTasks, TaskStats
+from todo_storage import CompactionPolicy
+from todo_store import TaskStore
+
+BACKENDS = ("json", "journal", "sqlite")
+SEARCHES = ("", "a", "port", "e rep", "task 1", "zzz")
+
+
+class StoreTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def open_store(self, backend, name="todo_data.json", **kwargs):
+        (self.dir / backend).mkdir(exist_ok=True)
+        store = TaskStore(self.dir / backend / name, backend, **kwargs)
+        store.load()
+        self.addCleanup(self.close_quietly, store)
+        return store
+
+    @staticmethod
+    def close_quietly(store):
+        try:
+            store.close()
+        except Exception:
+            pass
+
+    def populate(self, store, n=40, seed=0):
+        """Add n tasks and put them through every kind of mutation."""
+        rng = random.Random(seed)
+        words = ["Write report", "buy milk", "Call Ann", "task", "Fix the port", "ünïcode"]
+        tasks = [store.add(f"{rng.choice(words)} {i}", rng.choice(["High", "Medium", "Low"]),
+                           rng.choice([None, "2020-01-01", "2030-06-15", "not a date"]))
+                 for i in range(n)]
+        store.toggle(tasks[1])
+        store.update_many(tasks[2:8], "Set priority", priority="High")
+        store.update_many(tasks[8:12], "Mark complete", completed=True)
+        store.update(tasks[12], text="Write report again", due_date="2024-03-01")
+        store.delete(tasks[20:25])
+        return tasks
+
+    def assert_consistent(self, store):
+        """Every index agrees with a brute-force pass over store.tasks."""
+        live = store.tasks
+        self.assertEqual(set(store.task_index), {t.id for t in live})
+        self.assertTrue(all(store.task_index[t.id] is t for t in live))
+        stats, expected = store.stats.snapshot(), TaskStats(live).snapshot()
+        # a priority whose last task went away keeps a zero count
+        stats["by_priority"] = {p: n for p, n in stats["by_priority"].items() if n}
+        self.assertEqual(stats, expected)
+        ordered = sorted(live, key=SortedTasks.sort_key)
+        for filter_name in FILTERS:
+            for search in SEARCHES:
+                expected = [t for t in ordered if self.passes(t, filter_name) and search in t.text.lower()]
+                self.assertEqual([t.id for t in store.query(filter_name, search)], [t.id for t in expected],
+                                 (filter_name, search))
+
+    @staticmethod
+    def passes(t, filter_name):
+        if filter_name == "Pending":
+            return not t.completed
+        if filter_name == "Completed":
+            return t.completed
+        if filter_name.endswith("Priority"):
+            return t.priority == filter_name.split()[0]
+        return True
+
+
+class RoundTripTest(StoreTestCase):
+    def test_reopened_store_has_the_same_tasks(self):
+        for backend in BACKENDS:
+            for background in (False, True):
+                with self.subTest(backend=backend, background=background):
+                    name = f"bg_{background}.json"
+                    store = self.open_store(backend, name, background=background)
+                    self.populate(store)
+                    records = sorted(store.records(), key=lambda d: int(d["id"]))
+                    next_id = store.ids.next_id
+                    store.close()
+
+                    store = self.open_store(backend, name)
+                    self.assertEqual(sorted(store.records(), key=lambda d: int(d["id"])), records)
+                    self.assertEqual(store.ids.next_id, next_id)
+                    self.assert_consistent(store)
+
+    def test_checkpoint_and_compaction_keep_live_tasks_and_ids(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                store = self.open_store(backend, compaction=CompactionPolicy(max_tombstones=3))
+                self.populate(store)
+                store.compact_if_needed()
+                self.assertEqual(store.tombstones, [])
+                archived = [json.loads(line)["id"] for line in
+                            store.storage.archive_path.read_text(encoding="utf-8").splitlines()]
+                self.assertEqual(len(archived), 5)
+                live = sorted(store.records(), key=lambda d: int(d["id"]))
+                store.checkpoint()
+                store.close()
+
+                store = self.open_store(backend)
+                self.assertEqual(sorted(store.records(), key=lambda d: int(d["id"])), live)
+                # the highest id may have been archived, but is never handed out again
+                self.assertNotIn(store.add("new").id, archived)
+
+    def test_damaged_snapshot_is_recovered_from_backup(self):
+        store = self.open_store("json")
+        store.add("first")
+        store.add("second")
+        store.close()
+        path = self.dir / "json" / "todo_data.json"
+        path.write_text(path.read_text(encoding="utf-8")[:-20], encoding="utf-8")
+
+        store = self.open_store("json")
+        self.assertEqual(store.recovered_from, path.with_name("todo_data.json.1"))
+        self.assertEqual([t.text for t in store.tasks], ["first"])
+        self.assert_consistent(store)
+
+
+class IndexConsistencyTest(StoreTestCase):
+    def test_indexes_follow_mutations_and_undo(self):
+        for backend in BACKENDS:
+            for search_index in ("trigram", "word"):
+                with self.subTest(backend=backend, search_index=search_index):
+                    store = self.open_store(backend, f"{search_index}.json", search_index=search_index,
+                                            columnar=True)
+                    self.populate(store)
+                    if search_index == "trigram":
+                        self.assert_consistent(store)
+                    while store.undo():
+                        pass
+                    self.assertEqual(store.tasks, [])
+                    self.assertEqual(store.stats.total, 0)
+                    self.assertEqual(list(store.order), [])
+
+    def test_sqlite_query_ids_match_the_in_memory_query(self):
+        store = self.open_store("sqlite")
+        self.populate(store)
+        for filter_name in FILTERS:
+            for search in SEARCHES:
+                self.assertEqual(store.storage.query_ids(filter_name, search),
+                                 [t.id for t in store.query(filter_name, search)], (filter_name, search))
+
+    def test_streaming_load_matches_load(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                store = self.open_store(backend)
+                self.populate(store, n=120)
+                store.close()
+
+                loaded = self.open_store(backend)
+                streamed = TaskStore(self.dir / backend / "todo_data.json", backend)
+                self.addCleanup(self.close_quietly, streamed)
+                streamed.begin_load(batch_size=7)
+                while streamed.load_some(wait=True, max_tasks=10):
+                    pass
+                self.assertEqual(streamed.records(), loaded.records())
+                self.assertEqual(streamed.ids.next_id, loaded.ids.next_id)
+                self.assert_consistent(streamed)
+
+    def test_streaming_load_error_leaves_an_empty_store(self):
+        path = self.dir / "todo_data.json"
+        path.write_text('{"meta": {}, "tasks": [{"id": "1", "text": "a"}, {"id"', encoding="utf-8")
+        store = TaskStore(path, "json")
+        store.begin_load(batch_size=1)
+        with self.assertRaises(ValueError):
+            store.finish_load()
+        self.assertFalse(store.loading)
+        self.assertEqual(store.tasks, [])
+
+
+class UndoTest(StoreTestCase):
+    def test_undo_reverts_one_mutation_at_a_time(self):
+        store = self.open_store("journal")
+        a = store.add("alpha")
+        b = store.add("beta")
+        store.update_many([a, b], "Set priority", priority="Low")
+        store.delete([b])
+        self.assertEqual(store.undo(), "Delete 1 task(s)")
+        self.assertEqual({t.priority for t in store.tasks}, {"Low"})
+        self.assertEqual(store.undo(), "Set priority")
+        self.assertEqual({t.priority for t in store.tasks}, {"Medium"})
+        self.assertEqual(store.undo(), "Add task")
+        self.assertEqual([t.text for t in store.tasks], ["alpha"])
+        self.assertEqual(store.undo(), "Add task")
+        self.assertIsNone(store.undo())
+        self.assert_consistent(store)
+
+    def test_undo_restores_in_place_and_stale_tasks_are_ignored(self):
+        store = self.open_store("journal")
+        t = store.add("alpha")
+        store.update(t, text="beta")
+        store.undo()
+        self.assertIs(store.get(t.id), t)
+        self.assertEqual(t.text, "alpha")
+
+        store.delete([t])
+        store.undo()
+        self.assertIs(store.get(t.id), t)
+        self.assertFalse(t.deleted)
+
+        store.delete([t])
+        store.update(t, text="ghost")   # a deleted task is no longer live
+        store.delete([t])
+        self.assertEqual(t.text, "alpha")
+        self.assertEqual([label for label, _ in store.undo_stack], ["Add task", "Delete 1 task(s)"])
+        self.assert_consistent(store)
+
+    def test_undo_survives_reload_and_compaction(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                store = self.open_store(backend, compaction=CompactionPolicy(max_tombstones=1))
+                t = store.add("keep me")
+                store.delete([t])   # compacted right away
+                self.assertEqual(store.tombstones, [])
+                store.undo()
+                self.assertEqual([x.text for x in store.tasks], ["keep me"])
+                store.close()
+
+                store = self.open_store(backend)
+                self.assertEqual([(x.text, x.deleted) for x in store.tasks], [("keep me", False)])
+
+
+if __name__ == "__main__":
+    unittest.main()
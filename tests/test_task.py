@@ -0,0 +1,53 @@
+"""The Task record and its todo_data.json conversion."""
+
+import unittest
+
+from todo_task import INVALID_DATE, Task
+
+
+class TaskTest(unittest.TestCase):
+    def test_dict_round_trip_keeps_unknown_keys(self):
+        records = [
+            {"id": "1", "text": "Write report", "priority": "High", "due_date": "2024-02-29",
+             "completed": False, "created": "2024-01-01 09:00", "deleted": False},
+            {"id": "2", "text": "gone", "priority": "Low", "due_date": None, "completed": True,
+             "created": "2024-01-02 10:30", "deleted": True, "deleted_at": "2024-01-03 08:00",
+             "tags": ["home", "urgent"], "notes": {"nested": [1, 2.5, None]}},
+        ]
+        for d in records:
+            with self.subTest(id=d["id"]):
+                t = Task.from_dict(d)
+                self.assertEqual(t.to_dict(), d)
+                self.assertEqual(Task.from_dict(t.to_dict()).to_dict(), d)
+
+    def test_missing_fields_get_defaults(self):
+        t = Task.from_dict({"id": 7, "text": "bare"})
+        self.assertEqual(t.id, "7")
+        self.assertEqual((t.completed, t.deleted, t.created_day, t.extra), (False, False, "", None))
+        self.assertNotIn("deleted_at", t.to_dict())
+
+    def test_derived_fields_follow_the_due_date(self):
+        t = Task("1", "x", due_date="2024-01-02", created="2024-01-01 09:00")
+        self.assertEqual(t.created_day, "2024-01-01")
+        self.assertEqual(t.due_ord, 738887)   # date(2024, 1, 2).toordinal()
+        t.due_date = "someday"
+        self.assertEqual(t.due_ord, INVALID_DATE)
+        t.due_date = None
+        self.assertIsNone(t.due_ord)
+        self.assertEqual(t.to_dict()["due_date"], None)
+
+    def test_copy_from_keeps_the_object(self):
+        t = Task("1", "old", "Low", "2024-01-02")
+        t.copy_from(Task.from_dict({"id": "1", "text": "new", "priority": "High", "due_date": None,
+                                    "completed": True, "extra_key": 1}))
+        self.assertEqual(t.to_dict(), {"id": "1", "text": "new", "priority": "High", "due_date": None,
+                                       "completed": True, "created": "", "deleted": False, "extra_key": 1})
+        self.assertIsNone(t.due_ord)
+
+    def test_records_have_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            Task("1", "x").colour = "red"
+
+
+if __name__ == "__main__":
+    unittest.main()
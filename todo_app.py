@@ -3,45 +3,138 @@ To-Do List Manager with Date Picker (tkcalendar DateEntry)
 - Uses tkcalendar.DateEntry when available for picking due dates.
 - Falls back to plain Entry if tkcalendar is not installed.
 - Other features retained: ID generation, overdue highlighting, export, edit, keyboard shortcuts.
+- F12 opens a debug panel with timings of the main operations (see todo_profile.py).
+- tkcalendar is imported after the window is first shown; run with --startup-time to print
+  the startup timings (imports, loading tasks, building the UI, first paint) as JSON.
 """
 
+from time import perf_counter
+IMPORT_STARTED = perf_counter()   # startup timings count from here
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, date
 import json
 import os
+import sys
 from pathlib import Path
+from bisect import bisect_left
+
+from todo_index import FILTERS
+from todo_profile import Profiler
+from todo_store import TaskStore
+from todo_task import VIRTUAL_LIST_MIN_ROWS, VIRTUAL_OVERSCAN, build_row
 
-# Try to import DateEntry from tkcalendar; if not available, set a flag to use fallback Entry
-try:
-    from tkcalendar import DateEntry
-    TKCALENDAR_AVAILABLE = True
-except Exception:
-    TKCALENDAR_AVAILABLE = False
+IMPORTS_DONE = perf_counter()
+
+# tkcalendar is imported on first use (see date_entry_class); until then the flag is None
+DateEntry = None
+TKCALENDAR_AVAILABLE = None
 
 APP_NAME = "To-Do List Manager"
 DATA_FILE = Path.cwd() / "todo_data.json"   # Use project folder so PyCharm runs find it
+STORAGE_BACKEND = "journal"   # "journal" appends one record per change; "json" rewrites the whole file;
+                              # "sqlite" keeps tasks in todo_data.db (migrated from todo_data.json on first run)
+SEARCH_INDEX = "trigram"   # finds any substring, like a plain scan; "word" uses less memory but only
+                           # matches whole words and the prefix of the last one
+COLUMNAR_STORE = False   # also mirror tasks into todo_columns.ColumnarTasks, which answers store.count/select
+BACKGROUND_WRITES = True   # save on a writer thread, coalescing bursts of changes into one write
+WRITE_ERROR_POLL_MS = 500  # how often the UI checks for failed background writes
+STREAMING_LOAD = True      # show the first tasks while the rest of the file is still being read
+LOAD_POLL_MS = 20          # pause between steps of a streaming load, so the window stays responsive
+LOAD_STEP_TASKS = 5000     # tasks indexed per step
+PROFILING = True           # time the operations below (about a microsecond per call); shown with F12
+PROFILED_METHODS = ("add_task", "toggle_complete", "set_priority", "undo", "refresh_task_list")
+# also timed: edit_task, delete_task and clear_completed, from the user's confirmation on, and the
+# store's persist and save (save.write is the background writer's share, not available to cProfile)
+PROFILED_OPERATIONS = PROFILED_METHODS + ("edit_task", "delete_task", "clear_completed", "persist", "save")
+DEBUG_PANEL_REFRESH_MS = 1000
+LAZY_STARTUP = True        # first paint with a plain due date Entry; tkcalendar's DateEntry replaces it afterwards
+REFRESH_DEBOUNCE_MS = 150   # quiet time after a keystroke or filter change before the list refreshes
+POPULATE_CHUNK_ROWS = 250      # rows per step when filling an empty Treeview; events are handled between steps
+# Inserts a flat list of (iid, values, tags) triples in one Tcl call instead of one
+# Treeview.insert round trip per row.
+TREE_INSERT_TCL = """
+proc todo_tree_insert {tree rows} {
+    foreach {iid values tags} $rows {
+        $tree insert {} end -id $iid -values $values -tags $tags
+    }
+}
+"""
 
-def next_id(tasks):
-    """Return next integer ID based on max existing id (handles deleted tasks)."""
-    if not tasks:
-        return 1
-    try:
-        max_id = max(int(t.get("id", 0)) for t in tasks)
-    except ValueError:
-        max_id = 0
-    return max_id + 1
+def longest_increasing_run(seq):
+    """Return the indices of one longest strictly increasing subsequence of seq."""
+    tails, tail_idx, prev = [], [], [-1] * len(seq)
+    for i, x in enumerate(seq):
+        k = bisect_left(tails, x)
+        if k:
+            prev[i] = tail_idx[k - 1]
+        if k == len(tails):
+            tails.append(x)
+            tail_idx.append(i)
+        else:
+            tails[k] = x
+            tail_idx[k] = i
+    run = set()
+    i = tail_idx[-1] if tail_idx else -1
+    while i >= 0:
+        run.add(i)
+        i = prev[i]
+    return run
+
+def date_entry_class():
+    """Import tkcalendar on first use; return its DateEntry, or None if it is not installed."""
+    global DateEntry, TKCALENDAR_AVAILABLE
+    if TKCALENDAR_AVAILABLE is None:
+        try:
+            from tkcalendar import DateEntry
+            TKCALENDAR_AVAILABLE = True
+        except Exception:
+            TKCALENDAR_AVAILABLE = False
+    return DateEntry
 
 class TodoApp:
-    def __init__(self, root):
+    def __init__(self, root, report_startup=False):
         self.root = root
         self.root.title(APP_NAME)
         self.root.geometry("900x650")
         self.root.minsize(800, 500)
 
+        # instance attributes shadow the methods, so buttons, key bindings and internal
+        # calls all go through the timers
+        self.profiler = Profiler(PROFILING)
+        for name in PROFILED_METHODS:
+            setattr(self, name, self.profiler.wrap(name, getattr(self, name)))
+        self.debug_panel = None
+
+        # seconds per startup phase, reported by on_first_paint
+        self.startup = {"import": IMPORTS_DONE - IMPORT_STARTED}
+        self.report_startup = report_startup
+
         # data
+        started = perf_counter()
         self.data_file = DATA_FILE
-        self.tasks = self.load_tasks()
+        self.store = TaskStore(self.data_file, STORAGE_BACKEND, SEARCH_INDEX, COLUMNAR_STORE,
+                               background=BACKGROUND_WRITES, profiler=self.profiler)
+        if STREAMING_LOAD:
+            self.store.begin_load()
+        else:
+            self.load_tasks()
+        self.startup["load_tasks"] = perf_counter() - started
+        self.rendered_rows = {}    # tree item id -> (values, tags) currently shown
+        self.rendered_order = []   # tree item ids in display order
+        self.visible = []          # every task passing the current filter/search, in display order
+        # ids of the selected tasks, including rows scrolled out of the virtual window; the
+        # Treeview's own selection only covers the rows it holds
+        self.selected_ids = set()
+        self.select_anchor = None  # task id of the last plain or Ctrl click, for Shift+click ranges
+        self.shown_selection = ()  # Treeview selection as apply_selection left it
+        self.extend_selection = False   # the next selection change is a Ctrl+click: keep hidden rows
+        self.virtual_mode = False  # True while only a window of self.visible is in the Treeview
+        self.view_top = 0          # index in self.visible of the first row shown in virtual mode
+        self.refresh_job = None    # pending root.after id from schedule_refresh
+        self.populate_job = None   # pending root.after id of the next populate_tree step
+        self.populate_status = ("", "")   # (status bar text before populate_tree, its progress text)
 
         # UI state vars
         self.priority_var = tk.StringVar(value="Medium")
@@ -49,10 +142,49 @@ class TodoApp:
         self.search_var = tk.StringVar()
         self.status_var = tk.StringVar(value="Ready")
 
+        started = perf_counter()
         self.setup_style()
         self.setup_ui()
+        self.startup["build_ui"] = perf_counter() - started
+        if self.store.loading:
+            # first paint as soon as the first batch is in; continue_loading takes in the rest
+            started = perf_counter()
+            self.continue_loading(wait=True)
+            self.startup["load_tasks"] += perf_counter() - started
+        started = perf_counter()
         self.refresh_task_list()
+        self.startup["fill_list"] = perf_counter() - started
         self.setup_bindings()
+        self.root.after(WRITE_ERROR_POLL_MS, self.poll_write_errors)
+        # the task list is drawn by an idle callback its first <Expose> schedules
+        self.first_expose = self.tree.bind("<Expose>", self.on_tree_exposed, add="+")
+
+    def on_tree_exposed(self, event=None):
+        if self.first_expose is None:
+            return
+        self.tree.unbind("<Expose>", self.first_expose)
+        self.first_expose = None
+        # queued behind the redraw, so it runs once the rows are on screen
+        self.root.after_idle(self.on_first_paint)
+
+    def on_first_paint(self):
+        self.startup["first_paint"] = perf_counter() - IMPORT_STARTED
+        for phase, seconds in self.startup.items():
+            self.profiler.record(f"startup.{phase}", seconds)
+        if self.report_startup:
+            print(json.dumps({phase: round(seconds, 4) for phase, seconds in self.startup.items()}))
+            try:
+                # let the loader thread finish before the engine it reads from is closed
+                self.store.finish_load()
+                self.store.close()
+            except Exception as e:
+                print(f"Failed to close the data file: {e}", file=sys.stderr)
+            self.root.destroy()
+            return
+        if LAZY_STARTUP:
+            started = perf_counter()
+            self.upgrade_date_widget()
+            self.profiler.record("startup.tkcalendar", perf_counter() - started)
 
     def setup_style(self):
         style = ttk.Style(self.root)
@@ -93,19 +225,9 @@ class TodoApp:
         ttk.Label(add_frame, text="Due Date:").grid(row=1, column=0, padx=6, pady=(6,0), sticky=tk.W)
 
         # Due date widget: DateEntry if tkcalendar available, else plain Entry
-        if TKCALENDAR_AVAILABLE:
-            # DateEntry uses date_pattern 'y-mm-dd' or 'yyyy-mm-dd' depending on tkcalendar version.
-            # Use 'yyyy-mm-dd' to be explicit if supported, otherwise 'y-mm-dd' works on older versions.
-            try:
-                self.due_date_widget = DateEntry(add_frame, width=16, date_pattern='yyyy-mm-dd')
-            except TypeError:
-                # Fallback if the DateEntry version doesn't support 'yyyy-mm-dd' pattern name
-                self.due_date_widget = DateEntry(add_frame, width=16, date_pattern='y-mm-dd')
-        else:
-            self.due_date_widget = ttk.Entry(add_frame, width=20)
-            self.due_date_widget.insert(0, "YYYY-MM-DD (optional)")
-            self.due_date_widget.bind("<FocusIn>", self._clear_date_placeholder)
-
+        # (with LAZY_STARTUP the plain Entry is shown first and upgrade_date_widget swaps it)
+        self.add_frame = add_frame
+        self.due_date_widget = self.create_date_widget(add_frame, plain=LAZY_STARTUP)
         self.due_date_widget.grid(row=1, column=1, padx=(0,6), pady=(6,0), sticky=tk.W)
 
         add_btn = ttk.Button(add_frame, text="Add Task", command=self.add_task)
@@ -117,15 +239,14 @@ class TodoApp:
         left.columnconfigure(0, weight=1)
 
         ttk.Label(left, text="Filter:", font=('Segoe UI', 10, 'bold')).pack(anchor=tk.W)
-        filters = ["All", "Pending", "Completed", "High Priority", "Medium Priority", "Low Priority"]
-        for f in filters:
+        for f in FILTERS:
             ttk.Radiobutton(left, text=f, variable=self.filter_var, value=f,
-                            command=self.refresh_task_list).pack(anchor=tk.W, pady=2)
+                            command=self.schedule_refresh).pack(anchor=tk.W, pady=2)
 
         ttk.Label(left, text="Search:", font=('Segoe UI', 10, 'bold')).pack(anchor=tk.W, pady=(10,0))
         search_entry = ttk.Entry(left, textvariable=self.search_var)
         search_entry.pack(fill=tk.X, pady=(2,6))
-        self.search_var.trace_add("write", lambda *_: self.refresh_task_list())
+        self.search_var.trace_add("write", lambda *_: self.schedule_refresh())
 
         self.stats_label = ttk.Label(left, text="", font=('Segoe UI', 9))
         self.stats_label.pack(anchor=tk.W, pady=(8, 0))
@@ -139,7 +260,7 @@ class TodoApp:
         list_frame.columnconfigure(0, weight=1)
 
         columns = ("ID", "Priority", "Task", "Due Date", "Days Left", "Status", "Created")
-        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode='browse', height=18)
+        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode='extended', height=18)
 
         for col in columns:
             self.tree.heading(col, text=col)
@@ -151,20 +272,29 @@ class TodoApp:
         self.tree.column("Status", width=90, anchor=tk.CENTER)
         self.tree.column("Created", width=110, anchor=tk.CENTER)
 
-        vsb = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
+        # The scrollbar goes through on_scrollbar/on_tree_yscroll so it can track either the
+        # Treeview itself or, in virtual mode, the position within self.visible.
+        self.vsb = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.tree.configure(yscrollcommand=self.on_tree_yscroll)
         self.tree.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
-        vsb.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.vsb.grid(row=0, column=1, sticky=(tk.N, tk.S))
 
         # Buttons row
         btn_frame = ttk.Frame(main)
         btn_frame.grid(row=3, column=0, columnspan=4, pady=10, sticky=tk.W)
 
         ttk.Button(btn_frame, text="Mark Complete", command=self.toggle_complete).pack(side=tk.LEFT, padx=6)
+        priority_btn = ttk.Menubutton(btn_frame, text="Set Priority")
+        priority_menu = tk.Menu(priority_btn, tearoff=0)
+        for p in ("High", "Medium", "Low"):
+            priority_menu.add_command(label=p, command=lambda p=p: self.set_priority(p))
+        priority_btn["menu"] = priority_menu
+        priority_btn.pack(side=tk.LEFT, padx=6)
         ttk.Button(btn_frame, text="Edit Task", command=self.edit_task).pack(side=tk.LEFT, padx=6)
         ttk.Button(btn_frame, text="Delete Task", command=self.delete_task).pack(side=tk.LEFT, padx=6)
         ttk.Button(btn_frame, text="Clear Completed", command=self.clear_completed).pack(side=tk.LEFT, padx=6)
         ttk.Button(btn_frame, text="Export Task...", command=self.export_task).pack(side=tk.LEFT, padx=6)
+        ttk.Button(btn_frame, text="Undo", command=self.undo).pack(side=tk.LEFT, padx=6)
 
         # Status bar
         status_bar = ttk.Label(main, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
@@ -176,16 +306,53 @@ class TodoApp:
         self.tree.tag_configure('high_priority', foreground='red', font=('Segoe UI', 10, 'bold'))
         self.tree.tag_configure('medium_priority', foreground='orange')
         self.tree.tag_configure('low_priority', foreground='green')
+        self.root.tk.eval(TREE_INSERT_TCL)
+
+    def create_date_widget(self, parent, plain=False):
+        if not plain and date_entry_class():
+            # DateEntry uses date_pattern 'y-mm-dd' or 'yyyy-mm-dd' depending on tkcalendar version.
+            # Use 'yyyy-mm-dd' to be explicit if supported, otherwise 'y-mm-dd' works on older versions.
+            try:
+                return DateEntry(parent, width=16, date_pattern='yyyy-mm-dd')
+            except TypeError:
+                # Fallback if the DateEntry version doesn't support 'yyyy-mm-dd' pattern name
+                return DateEntry(parent, width=16, date_pattern='y-mm-dd')
+        widget = ttk.Entry(parent, width=20)
+        widget.insert(0, "YYYY-MM-DD (optional)")
+        widget.bind("<FocusIn>", self._clear_date_placeholder)
+        return widget
+
+    def upgrade_date_widget(self):
+        """Replace the plain due date Entry with a DateEntry, unless the user is already typing in it."""
+        old = self.due_date_widget
+        if not date_entry_class() or isinstance(old, DateEntry):
+            return
+        if self.root.focus_get() is old or not old.get().startswith("YYYY"):
+            return
+        self.due_date_widget = self.create_date_widget(self.add_frame)
+        self.due_date_widget.grid(row=1, column=1, padx=(0,6), pady=(6,0), sticky=tk.W)
+        old.destroy()
 
     def setup_bindings(self):
         self.tree.bind('<Double-1>', lambda e: self.on_tree_double_click())
+        self.tree.bind('<MouseWheel>', self.on_tree_wheel)
+        self.tree.bind('<Button-4>', self.on_tree_wheel)
+        self.tree.bind('<Button-5>', self.on_tree_wheel)
+        self.tree.bind('<Configure>', lambda e: self.virtual_mode and self.render_visible())
+        self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
+        self.tree.bind('<Button-1>', self.on_tree_click)
+        self.tree.bind('<Control-Button-1>', lambda e: self.on_tree_click(e, extend=True))
+        self.tree.bind('<Shift-Button-1>', self.on_tree_shift_click)
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         # keyboard shortcuts
         self.root.bind_all('<Control-n>', lambda e: self.task_entry.focus_set())
         self.root.bind_all('<Control-N>', lambda e: self.task_entry.focus_set())
         self.root.bind_all('<Control-e>', lambda e: self.edit_task())
         self.root.bind_all('<Delete>', lambda e: self.delete_task())
+        self.root.bind_all('<Control-z>', lambda e: self.undo())
+        self.root.bind_all('<Control-Z>', lambda e: self.undo())
         self.root.bind_all('<Control-q>', lambda e: self.on_close())
+        self.root.bind_all('<F12>', lambda e: self.open_debug_panel())
 
     def _clear_date_placeholder(self, event):
         widget = event.widget
@@ -203,6 +370,7 @@ class TodoApp:
             return "INVALID"
 
     def add_task(self):
+        self.finish_loading()
         text = self.task_entry.get().strip()
         if not text:
             messagebox.showwarning("Warning", "Please enter a task description.")
@@ -232,18 +400,10 @@ class TodoApp:
                     return
                 due = valid.isoformat()
 
-        task = {
-            "id": str(next_id(self.tasks)),
-            "text": text,
-            "priority": self.priority_var.get(),
-            "due_date": due,
-            "completed": False,
-            "created": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "deleted": False
-        }
-
-        self.tasks.append(task)
-        self.save_tasks()
+        try:
+            self.store.add(text, self.priority_var.get(), due)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save tasks: {e}")
         self.refresh_task_list()
 
         self.task_entry.delete(0, tk.END)
@@ -261,26 +421,61 @@ class TodoApp:
 
         self.status_var.set(f"Task added: {text}")
 
-    def get_selected_task(self):
-        sel = self.tree.selection()
-        if not sel:
+    def get_selected_tasks(self):
+        """Every selected task (the Treeview allows extended selection); warns if there is none."""
+        self.finish_loading()
+        tasks = self.store.get_many(self.selected_ids)
+        if not tasks:
             messagebox.showwarning("Warning", "Please select a task.")
-            return None
-        values = self.tree.item(sel[0], 'values')
-        task_id = values[0]
-        for t in self.tasks:
-            if t.get('id') == str(task_id) and not t.get('deleted', False):
-                return t
-        return None
+        return tasks
+
+    def get_selected_task(self):
+        """The first selected task, for actions that work on one task (edit, export)."""
+        tasks = self.get_selected_tasks()
+        return tasks[0] if tasks else None
 
     def toggle_complete(self):
-        t = self.get_selected_task()
-        if not t:
+        tasks = self.get_selected_tasks()
+        if not tasks:
+            return
+        if len(tasks) == 1:
+            t = tasks[0]
+            try:
+                self.store.toggle(t)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save tasks: {e}")
+            self.refresh_task_list()
+            self.status_var.set(f"Task {'completed' if t.completed else 'marked pending'}: {t.text}")
             return
-        t['completed'] = not t.get('completed', False)
-        self.save_tasks()
+        # several tasks: complete them all, or reopen them all if they were all done already
+        done = not all(t.completed for t in tasks)
+        label = f"Mark {len(tasks)} tasks {'complete' if done else 'pending'}"
+        try:
+            self.store.update_many(tasks, label, completed=done)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save tasks: {e}")
+        self.refresh_task_list()
+        self.status_var.set(f"{len(tasks)} tasks marked {'complete' if done else 'pending'}")
+
+    def set_priority(self, priority):
+        tasks = self.get_selected_tasks()
+        if not tasks:
+            return
+        try:
+            self.store.update_many(tasks, f"Set priority of {len(tasks)} task(s)", priority=priority)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save tasks: {e}")
         self.refresh_task_list()
-        self.status_var.set(f"Task {'completed' if t['completed'] else 'marked pending'}: {t['text']}")
+        self.status_var.set(f"Priority set to {priority} for {len(tasks)} task(s)")
+
+    def undo(self):
+        try:
+            label = self.store.undo()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save tasks: {e}")
+            label = "last change"
+        self.refresh_task_list()
+        self.status_var.set(f"Undone: {label}" if label else "Nothing to undo")
 
     def edit_task(self):
         t = self.get_selected_task()
@@ -297,32 +492,32 @@ class TodoApp:
         ttk.Label(dlg, text="Task:").grid(row=0, column=0, padx=10, pady=8, sticky=tk.W)
         e_task = ttk.Entry(dlg, width=60)
         e_task.grid(row=0, column=1, padx=10, pady=8)
-        e_task.insert(0, t['text'])
+        e_task.insert(0, t.text)
 
         ttk.Label(dlg, text="Priority:").grid(row=1, column=0, padx=10, pady=8, sticky=tk.W)
-        pvar = tk.StringVar(value=t['priority'])
+        pvar = tk.StringVar(value=t.priority)
         pcombo = ttk.Combobox(dlg, textvariable=pvar, values=["High", "Medium", "Low"], state="readonly", width=12)
         pcombo.grid(row=1, column=1, padx=10, pady=8, sticky=tk.W)
 
         ttk.Label(dlg, text="Due Date:").grid(row=2, column=0, padx=10, pady=8, sticky=tk.W)
 
         # Use DateEntry in edit dialog if available, else Entry
-        if TKCALENDAR_AVAILABLE:
+        if date_entry_class():
             try:
                 d_entry = DateEntry(dlg, width=16, date_pattern='yyyy-mm-dd')
             except TypeError:
                 d_entry = DateEntry(dlg, width=16, date_pattern='y-mm-dd')
             # populate existing due date if present
-            if t.get('due_date'):
+            if t.due_date:
                 try:
-                    d_entry.set_date(t.get('due_date'))
+                    d_entry.set_date(t.due_date)
                 except Exception:
                     # ignore if set_date fails; DateEntry will display its default
                     pass
         else:
             d_entry = ttk.Entry(dlg, width=20)
-            if t.get('due_date'):
-                d_entry.insert(0, t.get('due_date'))
+            if t.due_date:
+                d_entry.insert(0, t.due_date)
 
         d_entry.grid(row=2, column=1, padx=10, pady=8, sticky=tk.W)
 
@@ -353,11 +548,18 @@ class TodoApp:
                 else:
                     new_due_iso = None
 
-            t['text'] = new_text
-            t['priority'] = pvar.get()
-            t['due_date'] = new_due_iso
-            self.save_tasks()
-            self.refresh_task_list()
+            with self.profiler.measure("edit_task"):
+                # the task may have been replaced or deleted (undo) while the dialog was open
+                current = self.store.get(t.id)
+                if current is None:
+                    messagebox.showwarning("Warning", "This task no longer exists.")
+                    dlg.destroy()
+                    return
+                try:
+                    self.store.update(current, text=new_text, priority=pvar.get(), due_date=new_due_iso)
+                except Exception as e:
+                    messagebox.showerror("Error", f"Failed to save tasks: {e}")
+                self.refresh_task_list()
             self.status_var.set("Task updated")
             dlg.destroy()
 
@@ -367,113 +569,319 @@ class TodoApp:
         ttk.Button(btn_frame, text="Cancel", command=dlg.destroy).pack(side=tk.LEFT, padx=6)
 
     def delete_task(self):
-        t = self.get_selected_task()
-        if not t:
+        tasks = self.get_selected_tasks()
+        if not tasks:
             return
-        if messagebox.askyesno("Delete", f"Delete task: {t['text']}?"):
-            t['deleted'] = True
-            self.save_tasks()
-            self.refresh_task_list()
-            self.status_var.set("Task deleted")
+        question = f"Delete task: {tasks[0].text}?" if len(tasks) == 1 else f"Delete {len(tasks)} tasks?"
+        if messagebox.askyesno("Delete", question):
+            with self.profiler.measure("delete_task"):
+                try:
+                    self.store.delete(tasks)
+                except Exception as e:
+                    messagebox.showerror("Error", f"Failed to save tasks: {e}")
+                self.refresh_task_list()
+            self.status_var.set("Task deleted" if len(tasks) == 1 else f"{len(tasks)} tasks deleted")
 
     def clear_completed(self):
-        comp = [t for t in self.tasks if t.get('completed') and not t.get('deleted', False)]
+        self.finish_loading()
+        comp = self.store.completed_tasks()
         if not comp:
             messagebox.showinfo("Info", "No completed tasks to clear.")
             return
         if messagebox.askyesno("Confirm", f"Clear {len(comp)} completed task(s)?"):
-            for t in comp:
-                t['deleted'] = True
-            self.save_tasks()
-            self.refresh_task_list()
+            with self.profiler.measure("clear_completed"):
+                try:
+                    self.store.delete(comp)
+                except Exception as e:
+                    messagebox.showerror("Error", f"Failed to save tasks: {e}")
+                self.refresh_task_list()
             self.status_var.set(f"Cleared {len(comp)} completed tasks")
 
     def on_tree_double_click(self):
         # Edit on double click
         self.edit_task()
 
-    def refresh_task_list(self):
-        for it in self.tree.get_children():
-            self.tree.delete(it)
+    def schedule_refresh(self, delay=REFRESH_DEBOUNCE_MS):
+        """Refresh the list once input has been quiet for delay ms; bursts collapse into one refresh."""
+        self.cancel_scheduled_refresh()
+        self.refresh_job = self.root.after(delay, self.refresh_task_list)
 
-        f = self.filter_var.get()
-        s = self.search_var.get().lower().strip()
+    def cancel_scheduled_refresh(self):
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+            self.refresh_job = None
 
-        visible = []
-        for t in self.tasks:
-            if t.get('deleted', False):
-                continue
-            if f == "Pending" and t.get('completed'):
-                continue
-            if f == "Completed" and not t.get('completed'):
-                continue
-            if f.endswith("Priority") and t.get('priority') != f.split()[0]:
-                continue
-            if s and s not in t.get('text', '').lower():
-                continue
-            visible.append(t)
-
-        pri_order = {"High": 0, "Medium": 1, "Low": 2}
-        def sort_key(x):
-            due = x.get('due_date') or "9999-12-31"
-            return (x.get('completed', False), pri_order.get(x.get('priority'), 1), due, x.get('created',''))
-        visible.sort(key=sort_key)
-
-        today = date.today()
-        for t in visible:
-            due = t.get('due_date')
-            if due:
-                try:
-                    due_date = datetime.strptime(due, "%Y-%m-%d").date()
-                    delta = (due_date - today).days
-                    days_left = f"{delta} day(s)" if delta >= 0 else f"{abs(delta)} day(s) overdue"
-                except Exception:
-                    days_left = "Invalid date"
-                    due_date = None
-            else:
-                days_left = "N/A"
-                due_date = None
-
-            status = "✓ Done" if t.get('completed') else "Pending"
-            created = t.get('created', '').split()[0]
-            tags = []
-            if t.get('completed'):
-                tags.append('completed')
+    def refresh_task_list(self):
+        # an immediate refresh supersedes any debounced one still waiting
+        self.cancel_scheduled_refresh()
+        self.visible = self.store.query(self.filter_var.get(), self.search_var.get())
+        if self.selected_ids:
+            # tasks filtered out, deleted or undone away are no longer selected
+            self.selected_ids &= {t.id for t in self.visible}
+        self.render_visible()
+
+        st = self.store.stats
+        self.stats_label.config(text=f"Total: {st.total} | Pending: {st.pending} | "
+                                     f"Completed: {st.completed} | Overdue: {st.overdue()}")
+
+    def render_visible(self):
+        """Show self.visible in the Treeview, windowed around view_top when the list is very long."""
+        self.cancel_population()
+        today = date.today().toordinal()
+        self.virtual_mode = len(self.visible) > VIRTUAL_LIST_MIN_ROWS
+        if not self.virtual_mode:
+            rows = [(t.id,) + build_row(t, today) for t in self.visible]
+            if not self.rendered_order and len(rows) > POPULATE_CHUNK_ROWS:
+                self.populate_status = (self.status_var.get(), "")
+                self.populate_tree(rows)
             else:
-                if t.get('priority') == 'High':
-                    tags.append('high_priority')
-                elif t.get('priority') == 'Medium':
-                    tags.append('medium_priority')
-                else:
-                    tags.append('low_priority')
-                if due_date and due_date < today:
-                    tags.append('overdue')
+                self.reconcile_tree(rows)
+                self.apply_selection()
+            return
 
-            self.tree.insert('', tk.END, values=(
-                t.get('id'), t.get('priority'), t.get('text'), due or "No due date", days_left, status, created
-            ), tags=tags)
+        page = self.page_size()
+        total = len(self.visible)
+        self.view_top = max(0, min(self.view_top, total - page))
+        window = self.visible[self.view_top:self.view_top + page + VIRTUAL_OVERSCAN]
+        self.reconcile_tree([(t.id,) + build_row(t, today) for t in window])
+        self.apply_selection()
+        self.tree.yview_moveto(0)
+        self.vsb.set(self.view_top / total, min(1.0, (self.view_top + page) / total))
+
+    def populate_tree(self, rows, start=0):
+        """Append rows to the Treeview one chunk per event-loop turn, with progress in the status bar.
+
+        Only used on an empty tree; rendered_rows/rendered_order grow with every chunk, so a
+        refresh in between (which cancels the rest) reconciles against what is really shown.
+        """
+        chunk = rows[start:start + POPULATE_CHUNK_ROWS]
+        self.tree.tk.call('todo_tree_insert', str(self.tree), tuple(x for row in chunk for x in row))
+        for iid, values, tags in chunk:
+            self.rendered_rows[iid] = (values, tags)
+            self.rendered_order.append(iid)
+        self.apply_selection()
+        done = start + len(chunk)
+        if done < len(rows):
+            progress = f"Showing tasks... {done:,} of {len(rows):,}"
+            self.populate_status = (self.populate_status[0], progress)
+            self.status_var.set(progress)
+            self.populate_job = self.root.after(1, self.populate_tree, rows, done)
+        else:
+            self.populate_job = None
+            self.restore_status()
+
+    def cancel_population(self):
+        if self.populate_job is not None:
+            self.root.after_cancel(self.populate_job)
+            self.populate_job = None
+            self.restore_status()
+
+    def restore_status(self):
+        # unless something else has put a message there in the meantime
+        before, progress = self.populate_status
+        if progress and self.status_var.get() == progress:
+            self.status_var.set(before)
+
+    def apply_selection(self):
+        """Select the rows in the Treeview whose tasks are in selected_ids."""
+        if self.selected_ids:
+            self.tree.selection_set([iid for iid in self.rendered_order if iid in self.selected_ids])
+        # the <<TreeviewSelect>> events this and the render before it cause are not user changes
+        self.shown_selection = self.tree.selection()
+
+    def on_tree_select(self, event=None):
+        selection = self.tree.selection()
+        if selection == self.shown_selection:
+            return   # rows scrolled in or out of the window, not a new selection
+        # tree item ids are task ids (see render_visible)
+        if self.extend_selection:
+            # Ctrl+click adds or removes one row; rows outside the window stay selected
+            self.selected_ids = (self.selected_ids - self.rendered_rows.keys()) | set(selection)
+        else:
+            # clicks and keyboard navigation replace the selection
+            self.selected_ids = set(selection)
+        self.extend_selection = False
+        self.shown_selection = selection
+
+    def on_tree_click(self, event, extend=False):
+        iid = self.tree.identify_row(event.y)
+        if not iid:
+            return
+        self.select_anchor = iid
+        self.extend_selection = extend
+        if not extend:
+            # a plain click starts over, also for rows scrolled out of the virtual window
+            self.selected_ids = {iid}
+
+    def on_tree_shift_click(self, event):
+        """Select every task from the anchor to the clicked row, across virtual pages."""
+        iid = self.tree.identify_row(event.y)
+        if not iid or self.select_anchor not in self.selected_ids:
+            return None   # nothing to extend from: Tk's default handling
+        ids = [t.id for t in self.visible]
+        first, last = sorted((ids.index(self.select_anchor), ids.index(iid)))
+        self.selected_ids = set(ids[first:last + 1])
+        self.apply_selection()
+        self.tree.focus(iid)
+        return "break"
+
+    def page_size(self):
+        """Number of rows that fit in the Treeview right now."""
+        rowheight = int(ttk.Style(self.root).lookup('Treeview', 'rowheight') or 20)
+        return max(int(self.tree.cget('height')), self.tree.winfo_height() // rowheight)
+
+    def scroll_virtual(self, top):
+        self.view_top = top
+        self.render_visible()
+
+    def on_scrollbar(self, *args):
+        if not self.virtual_mode:
+            self.tree.yview(*args)
+        elif args[0] == 'moveto':
+            self.scroll_virtual(int(float(args[1]) * len(self.visible)))
+        else:
+            step = self.page_size() if args[2] == 'pages' else 1
+            self.scroll_virtual(self.view_top + int(args[1]) * step)
 
-        total = len([x for x in self.tasks if not x.get('deleted', False)])
-        completed = len([x for x in self.tasks if x.get('completed') and not x.get('deleted', False)])
-        pending = total - completed
-        self.stats_label.config(text=f"Total: {total} | Pending: {pending} | Completed: {completed}")
+    def on_tree_yscroll(self, first, last):
+        # in virtual mode the scrollbar reflects view_top, not the materialized window
+        if not self.virtual_mode:
+            self.vsb.set(first, last)
+
+    def on_tree_wheel(self, event):
+        if not self.virtual_mode:
+            return None
+        direction = -1 if event.num == 4 or event.delta > 0 else 1
+        self.scroll_virtual(self.view_top + 3 * direction)
+        return "break"
+
+    def reconcile_tree(self, rows):
+        """Bring the Treeview to rows ((iid, values, tags) in display order) with the fewest Tk calls."""
+        old = self.rendered_rows
+        new = {iid: (values, tags) for iid, values, tags in rows}
+
+        gone = [iid for iid in self.rendered_order if iid not in new]
+        if gone:
+            self.tree.delete(*gone)
+
+        # Kept rows along the longest run already in the right relative order stay put;
+        # the other kept rows are detached and re-attached at their new index below.
+        old_pos = {iid: i for i, iid in enumerate(self.rendered_order)}
+        kept = [iid for iid, _, _ in rows if iid in old]
+        stable = longest_increasing_run([old_pos[iid] for iid in kept])
+        moving = {iid for k, iid in enumerate(kept) if k not in stable}
+        if moving:
+            self.tree.detach(*moving)
+
+        placed = len(stable)   # rows currently attached; rows before index i are final
+        for i, (iid, values, tags) in enumerate(rows):
+            if iid not in old:
+                self.tree.insert('', i if i < placed else tk.END, iid=iid, values=values, tags=tags)
+                placed += 1
+                continue
+            if iid in moving:
+                self.tree.move(iid, '', i)
+                placed += 1
+            if old[iid] != (values, tags):
+                self.tree.item(iid, values=values, tags=tags)
+
+        self.rendered_rows = new
+        self.rendered_order = [iid for iid, _, _ in rows]
 
     def load_tasks(self):
-        if self.data_file.exists():
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception:
-                messagebox.showwarning("Warning", "Could not read data file; starting with empty list.")
-                return []
-        return []
+        try:
+            self.store.load()
+        except Exception:
+            messagebox.showwarning("Warning", "Could not read data file; starting with empty list.")
+            return
+        self.tasks_loaded()
 
-    def save_tasks(self):
+    def continue_loading(self, wait=False, block=False):
+        """Take in the next part of a streaming load (all of it if block) and reschedule itself."""
+        if not self.store.loading:
+            return
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.tasks, f, indent=2, ensure_ascii=False)
+            if block:
+                self.store.finish_load()
+            else:
+                self.store.load_some(wait=wait, max_tasks=LOAD_STEP_TASKS)
+        except Exception:
+            # damaged file: start over with the plain loader, which also tries the backups
+            self.load_tasks()
+        else:
+            if self.store.loading:
+                self.status_var.set(f"Loading tasks... {self.store.stats.total:,}")
+                self.root.after(LOAD_POLL_MS, self.continue_loading)
+                return
+            self.tasks_loaded()
+        self.status_var.set("Ready")
+        self.refresh_task_list()
+
+    def finish_loading(self):
+        """Complete a streaming load before anything that reads, changes or saves the task list."""
+        self.continue_loading(block=True)
+
+    def tasks_loaded(self):
+        if self.store.recovered_from:
+            messagebox.showwarning("Warning", f"Data file could not be read; restored tasks from backup "
+                                              f"{self.store.recovered_from.name}.")
+        try:
+            self.store.compact_if_needed()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save tasks: {e}")
+            messagebox.showerror("Error", f"Failed to compact tasks: {e}")
+
+    def poll_write_errors(self):
+        # the writer thread must not touch Tk, so its failures are picked up here
+        errors = self.store.write_errors()
+        if errors:
+            messagebox.showerror("Error", f"Failed to save tasks: {errors[-1]}")
+        self.root.after(WRITE_ERROR_POLL_MS, self.poll_write_errors)
+
+    def open_debug_panel(self):
+        """Show the operation timings, refreshed every second, and a cProfile trigger."""
+        if self.debug_panel is not None and self.debug_panel.winfo_exists():
+            self.debug_panel.lift()
+            return
+        dlg = self.debug_panel = tk.Toplevel(self.root)
+        dlg.title("Debug: operation timings")
+        dlg.geometry("760x520")
+
+        text = tk.Text(dlg, font=('Courier New', 9), wrap=tk.NONE, height=16)
+        text.pack(fill=tk.BOTH, expand=True, padx=8, pady=(8, 4))
+
+        row = ttk.Frame(dlg)
+        row.pack(fill=tk.X, padx=8)
+        ttk.Label(row, text="cProfile the next:").pack(side=tk.LEFT)
+        op_var = tk.StringVar(value="refresh_task_list")
+        ttk.Combobox(row, textvariable=op_var, values=PROFILED_OPERATIONS, state="readonly",
+                     width=20).pack(side=tk.LEFT, padx=6)
+
+        def arm():
+            op = op_var.get()
+            path = self.data_file.parent / f"todo_profile_{op}_{datetime.now():%Y%m%d_%H%M%S}.prof"
+            self.profiler.profile_next(op, path)
+            self.status_var.set(f"Profiling the next {op}")
+
+        ttk.Button(row, text="Arm", command=arm).pack(side=tk.LEFT)
+        stats = tk.Text(dlg, font=('Courier New', 9), wrap=tk.NONE, height=12)
+        stats.pack(fill=tk.BOTH, expand=True, padx=8, pady=(4, 8))
+        shown = [None]   # the last_profile currently in the stats box
+
+        def update():
+            if not dlg.winfo_exists():
+                return
+            text.delete('1.0', tk.END)
+            text.insert('1.0', self.profiler.report() if self.profiler.enabled
+                        else "Profiling is off (PROFILING in todo_app.py).")
+            last = self.profiler.last_profile
+            if last is not None and last is not shown[0]:
+                shown[0] = last
+                stats.delete('1.0', tk.END)
+                stats.insert('1.0', last[2])
+                self.status_var.set(f"cProfile stats for {last[0]} written to {last[1]}")
+            dlg.after(DEBUG_PANEL_REFRESH_MS, update)
+
+        update()
 
     def export_task(self):
         t = self.get_selected_task()
@@ -488,28 +896,33 @@ class TodoApp:
         try:
             if path.lower().endswith('.json'):
                 with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(t, f, indent=2, ensure_ascii=False)
+                    json.dump(t.to_dict(), f, indent=2, ensure_ascii=False)
             else:
                 with open(path, 'w', encoding='utf-8') as f:
-                    f.write(f"Task ID: {t.get('id')}\n")
-                    f.write(f"Task: {t.get('text')}\n")
-                    f.write(f"Priority: {t.get('priority')}\n")
-                    f.write(f"Due Date: {t.get('due_date') or 'No due date'}\n")
-                    f.write(f"Status: {'Done' if t.get('completed') else 'Pending'}\n")
-                    f.write(f"Created: {t.get('created')}\n")
+                    f.write(f"Task ID: {t.id}\n")
+                    f.write(f"Task: {t.text}\n")
+                    f.write(f"Priority: {t.priority}\n")
+                    f.write(f"Due Date: {t.due_date or 'No due date'}\n")
+                    f.write(f"Status: {'Done' if t.completed else 'Pending'}\n")
+                    f.write(f"Created: {t.created}\n")
             messagebox.showinfo("Exported", f"Task exported to {path}")
-            self.status_var.set(f"Exported task {t.get('id')}")
+            self.status_var.set(f"Exported task {t.id}")
         except Exception as e:
             messagebox.showerror("Error", f"Export failed: {e}")
 
     def on_close(self):
         if messagebox.askyesno("Quit", "Do you want to save and exit?"):
-            self.save_tasks()
+            self.finish_loading()
+            try:
+                self.store.checkpoint()
+                self.store.close()
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save tasks: {e}")
             self.root.destroy()
 
 def main():
     root = tk.Tk()
-    app = TodoApp(root)
+    app = TodoApp(root, report_startup="--startup-time" in sys.argv[1:])
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+"""
+Columnar mirror of the live tasks for analytical questions
+("how many high-priority pending tasks are overdue?").
+- One array per field (id, priority code, completed/deleted flags, due date ordinal,
+  created minute) plus a string table for the task text, indexed by row.
+- Filters and counts run as vectorized passes with NumPy when it is installed and as
+  plain loops over the array module's arrays otherwise.
+- TaskStore(columnar=True) keeps one up to date as store.columns; TaskStore.count and
+  TaskStore.select answer the same criteria from it (or by a scan without it).
+"""
+
+from array import array
+from datetime import datetime
+from itertools import compress
+
+# NumPy is optional; without it the same queries run as plain Python loops
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+PRIORITY_CODES = {"High": 0, "Medium": 1, "Low": 2}
+OTHER_PRIORITY = 3
+
+
+def matches(t, completed=None, priority=None, due_before=None, due_from=None):
+    """Whether task t passes the criteria of ColumnarTasks.mask (for stores without columns)."""
+    if completed is not None and t.completed != completed:
+        return False
+    code = PRIORITY_CODES.get(t.priority, OTHER_PRIORITY)
+    if priority is not None and code != PRIORITY_CODES.get(priority, OTHER_PRIORITY):
+        return False
+    if due_before is not None or due_from is not None:
+        due = t.due_ord or 0
+        if not due or (due_before is not None and due >= due_before) or (due_from is not None and due < due_from):
+            return False
+    return True
+
+
+def created_minute(created):
+    """Minutes since 0001-01-01 for a "YYYY-MM-DD HH:MM" string, 0 if it does not parse."""
+    try:
+        dt = datetime.strptime(created, "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return 0
+    return dt.toordinal() * 1440 + dt.hour * 60 + dt.minute
+
+
+class ColumnarTasks:
+    """Array-backed task columns; same remove/add protocol as todo_index.TaskStats.
+
+    A task keeps its row until compact(): remove() sets the row's deleted flag and add() of
+    the same id writes the row again, so a mutation is a handful of in-place array writes.
+    """
+
+    def __init__(self, tasks=()):
+        self.live = 0                  # rows holding a live task
+        self.rows = {}                 # task id -> row
+        self.task_ids = []             # row -> task id string
+        self.texts = []                # row -> task text (string table)
+        self.ids = array('q')          # numeric id, -1 if the id is not a number
+        self.priority = array('b')     # PRIORITY_CODES value
+        self.completed = bytearray()   # 1 if completed
+        self.deleted = bytearray()     # 1 if the row holds no live task
+        self.due = array('i')          # due date ordinal, 0 if none or invalid
+        self.created = array('q')      # see created_minute
+        for t in tasks:
+            self.add(t)
+
+    def __len__(self):
+        return self.live
+
+    def add(self, t):
+        row = self.rows.get(t.id)
+        if row is None:
+            row = self.rows[t.id] = len(self.task_ids)
+            self.task_ids.append(t.id)
+            self.texts.append(t.text)
+            self.ids.append(int(t.id) if t.id.isdigit() else -1)
+            self.priority.append(0)
+            self.completed.append(0)
+            self.deleted.append(1)
+            self.due.append(0)
+            self.created.append(created_minute(t.created))
+        if self.deleted[row]:
+            self.live += 1
+        self.texts[row] = t.text
+        self.priority[row] = PRIORITY_CODES.get(t.priority, OTHER_PRIORITY)
+        self.completed[row] = t.completed
+        self.deleted[row] = 0
+        self.due[row] = t.due_ord or 0
+
+    def remove(self, t):
+        row = self.rows.get(t.id)
+        if row is not None and not self.deleted[row]:
+            self.deleted[row] = 1
+            self.live -= 1
+
+    def compact(self):
+        """Drop the rows of deleted tasks; live rows keep their relative order."""
+        keep = [row for row, dead in enumerate(self.deleted) if not dead]
+        if len(keep) == len(self.task_ids):
+            return
+        self.task_ids = [self.task_ids[row] for row in keep]
+        self.texts = [self.texts[row] for row in keep]
+        for name in ("ids", "priority", "due", "created"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[row] for row in keep)))
+        self.completed = bytearray(self.completed[row] for row in keep)
+        self.deleted = bytearray(len(keep))
+        self.rows = {task_id: row for row, task_id in enumerate(self.task_ids)}
+
+    def mask(self, completed=None, priority=None, due_before=None, due_from=None):
+        """Per-row booleans for live tasks matching every given criterion.
+
+        priority is a name ("High", ...); due_before/due_from are date ordinals bounding the
+        due date (rows without a due date never match either bound).
+        """
+        code = None if priority is None else PRIORITY_CODES.get(priority, OTHER_PRIORITY)
+        if NUMPY_AVAILABLE:
+            m = np.frombuffer(self.deleted, dtype=np.uint8) == 0
+            if completed is not None:
+                m &= np.frombuffer(self.completed, dtype=np.uint8) == int(completed)
+            if code is not None:
+                m &= np.frombuffer(self.priority, dtype=np.int8) == code
+            if due_before is not None or due_from is not None:
+                due = np.frombuffer(self.due, dtype=np.int32)
+                m &= due > 0
+                if due_before is not None:
+                    m &= due < due_before
+                if due_from is not None:
+                    m &= due >= due_from
+            return m
+        return [not d
+                and (completed is None or c == completed)
+                and (code is None or p == code)
+                and ((due_before is None and due_from is None)
+                     or (du > 0 and (due_before is None or du < due_before)
+                         and (due_from is None or du >= due_from)))
+                for d, c, p, du in zip(self.deleted, self.completed, self.priority, self.due)]
+
+    def count(self, **criteria):
+        m = self.mask(**criteria)
+        return int(m.sum()) if NUMPY_AVAILABLE else sum(m)
+
+    def select_ids(self, **criteria):
+        """Ids of the matching tasks, in row (creation) order."""
+        m = self.mask(**criteria)
+        if NUMPY_AVAILABLE:
+            return [self.task_ids[i] for i in np.flatnonzero(m)]
+        return list(compress(self.task_ids, m))
+
+    def stats(self, today):
+        """The same counts as TaskStats.snapshot, computed in column passes; today is a date ordinal."""
+        total = self.count()
+        completed = self.count(completed=True)
+        return {"total": total, "pending": total - completed, "completed": completed,
+                "overdue": self.count(completed=False, due_before=today),
+                "by_priority": {p: self.count(priority=p) for p in PRIORITY_CODES}}
@@ -0,0 +1,289 @@
+"""
+In-memory indexes over the task list, kept up to date incrementally as tasks change.
+- WordIndex maps each lowercased word in a task's text to the ids of the tasks containing
+  it, with prefix lookup for the word still being typed in the Search box.
+- TrigramIndex maps every 3-character substring to the ids of the tasks containing it, so
+  any substring query (including one starting mid-word) narrows to a few candidates that
+  are then verified, keeping the exact semantics of the Search box.
+- TaskStats keeps the counts behind the stats label (total, pending, completed, overdue,
+  per priority), adjusted per mutation instead of recounted from the task list.
+- FilterBuckets keeps the ids of the tasks in each Filter radio button's bucket, so a
+  filter is a set lookup that can be intersected with a search result.
+- SortedTasks keeps every live task id in display order (pending first, then priority, due
+  date, created), so rendering walks an ordered structure instead of sorting.
+"""
+
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import date
+
+from todo_storage import PRIORITY_RANK
+
+WORD_RE = re.compile(r"\w+")
+FILTERS = ("All", "Pending", "Completed", "High Priority", "Medium Priority", "Low Priority")
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+class WordIndex:
+    """Inverted index: word -> set of task ids, plus a sorted vocabulary for prefix queries."""
+
+    def __init__(self):
+        self.postings = {}   # word -> set of task ids
+        self.vocab = []      # sorted distinct words
+        self.lowered = {}    # task id -> lowercased text, for the final substring check
+
+    def add(self, task_id, text):
+        lowered = (text or '').lower()
+        self.lowered[task_id] = lowered
+        for word in set(WORD_RE.findall(lowered)):
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                insort(self.vocab, word)
+            ids.add(task_id)
+
+    def remove(self, task_id):
+        lowered = self.lowered.pop(task_id, None)
+        if lowered is None:
+            return
+        for word in set(WORD_RE.findall(lowered)):
+            ids = self.postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(task_id)
+            if not ids:
+                del self.postings[word]
+                del self.vocab[bisect_left(self.vocab, word)]
+
+    def update(self, task_id, text):
+        self.remove(task_id)
+        self.add(task_id, text)
+
+    def prefix_ids(self, prefix):
+        ids = set()
+        i = bisect_left(self.vocab, prefix)
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            ids |= self.postings[self.vocab[i]]
+            i += 1
+        return ids
+
+    def search(self, query):
+        """Ids of tasks whose text contains query, or None if query has no words to look up.
+
+        Every complete word of the query must be a word of the task and the last (possibly
+        half-typed) word a word prefix; candidates are then checked with a plain substring
+        test, so a match that starts mid-word is not found by this index.
+        """
+        query = query.lower()
+        words = WORD_RE.findall(query)
+        if not words:
+            return None
+        *complete, last = words
+        if query[-1:].isalnum() or query.endswith('_'):
+            candidates = self.prefix_ids(last)
+        else:
+            complete.append(last)
+            candidates = None
+        for word in sorted(complete, key=lambda w: len(self.postings.get(w, ()))):
+            ids = self.postings.get(word, set())
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return {i for i in candidates if query in self.lowered[i]}
+
+
+class TrigramIndex:
+    """Trigram index: 3-char substring -> set of task ids; search is candidate-then-verify."""
+
+    def __init__(self):
+        self.postings = {}   # trigram -> set of task ids
+        self.lowered = {}    # task id -> lowercased text
+
+    @staticmethod
+    def trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, task_id, text):
+        lowered = (text or '').lower()
+        self.lowered[task_id] = lowered
+        for gram in self.trigrams(lowered):
+            self.postings.setdefault(gram, set()).add(task_id)
+
+    def remove(self, task_id):
+        lowered = self.lowered.pop(task_id, None)
+        if lowered is None:
+            return
+        for gram in self.trigrams(lowered):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def update(self, task_id, text):
+        self.remove(task_id)
+        self.add(task_id, text)
+
+    def search(self, query):
+        """Ids of tasks whose text contains query (same result as a substring scan)."""
+        query = query.lower()
+        grams = self.trigrams(query)
+        if not grams:
+            # too short for trigrams: scan the cached lowercased texts
+            return {i for i, text in self.lowered.items() if query in text}
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+            ids = self.postings.get(gram, set())
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return {i for i in candidates if query in self.lowered[i]}
+
+
+class TaskStats:
+    """Running counts over the live tasks.
+
+    Callers remove a task before changing it and add it back afterwards, so every counter
+    moves by at most one per task touched.
+    """
+
+    def __init__(self, tasks=()):
+        self.total = 0
+        self.completed = 0
+        self.by_priority = Counter()   # priority -> live tasks
+        self.pending_due = Counter()   # due date ordinal -> pending tasks due that day
+        for t in tasks:
+            self.add(t)
+
+    def _apply(self, t, n):
+        self.total += n
+        self.by_priority[t.priority] += n
+        if t.completed:
+            self.completed += n
+            return
+        due = t.due_ord
+        if due:
+            self.pending_due[due] += n
+            if not self.pending_due[due]:
+                del self.pending_due[due]
+
+    def add(self, t):
+        self._apply(t, 1)
+
+    def remove(self, t):
+        self._apply(t, -1)
+
+    @property
+    def pending(self):
+        return self.total - self.completed
+
+    def overdue(self, today=None):
+        """Pending tasks whose due date is before today (summed over distinct due dates)."""
+        today = (today or date.today()).toordinal()
+        return sum(n for due, n in self.pending_due.items() if due < today)
+
+    def snapshot(self, today=None):
+        return {"total": self.total, "pending": self.pending, "completed": self.completed,
+                "overdue": self.overdue(today), "by_priority": dict(self.by_priority)}
+
+
+class FilterBuckets:
+    """Ids of the live tasks in each filter bucket; same remove/add protocol as TaskStats."""
+
+    def __init__(self, tasks=()):
+        self.buckets = {name: set() for name in FILTERS}
+        for t in tasks:
+            self.add(t)
+
+    def _names(self, t):
+        names = ["All", "Completed" if t.completed else "Pending"]
+        by_priority = f"{t.priority} Priority"
+        if by_priority in self.buckets:
+            names.append(by_priority)
+        return names
+
+    def add(self, t):
+        for name in self._names(t):
+            self.buckets[name].add(t.id)
+
+    def remove(self, t):
+        for name in self._names(t):
+            self.buckets[name].discard(t.id)
+
+    def members(self, name):
+        return self.buckets.get(name, self.buckets["All"])
+
+
+class SortedTasks:
+    """Task ids in display order, stored as sort keys in a list of short sorted chunks.
+
+    Insert and remove are a bisect over the chunk maxima plus a shift within one chunk,
+    instead of re-sorting the whole list. Same remove/add protocol as TaskStats.
+    """
+    CHUNK = 512
+
+    def __init__(self, tasks=()):
+        self.keys = {}   # task id -> its current sort key
+        for t in tasks:
+            self.keys[t.id] = self.sort_key(t)
+        ordered = sorted(self.keys.values())
+        self.chunks = [ordered[i:i + self.CHUNK] for i in range(0, len(ordered), self.CHUNK)]
+        self.maxes = [chunk[-1] for chunk in self.chunks]
+
+    @staticmethod
+    def sort_key(t):
+        # the id goes last: it makes keys unique and keeps ties in creation order
+        return (t.completed, PRIORITY_RANK.get(t.priority, 1), t.due_date or "9999-12-31",
+                t.created or '', len(t.id), t.id)
+
+    def add(self, t):
+        key = self.sort_key(t)
+        self.keys[t.id] = key
+        if not self.chunks:
+            self.chunks.append([key])
+            self.maxes.append(key)
+            return
+        i = min(bisect_left(self.maxes, key), len(self.maxes) - 1)
+        chunk = self.chunks[i]
+        insort(chunk, key)
+        self.maxes[i] = chunk[-1]
+        if len(chunk) > 2 * self.CHUNK:
+            self.chunks[i:i + 1] = [chunk[:self.CHUNK], chunk[self.CHUNK:]]
+            self.maxes[i:i + 1] = [chunk[self.CHUNK - 1], chunk[-1]]
+
+    def remove(self, t):
+        key = self.keys.pop(t.id, None)
+        if key is None:
+            return
+        i = bisect_left(self.maxes, key)
+        chunk = self.chunks[i]
+        del chunk[bisect_left(chunk, key)]
+        if chunk:
+            self.maxes[i] = chunk[-1]
+        else:
+            del self.chunks[i]
+            del self.maxes[i]
+
+    def key_of(self, task_id):
+        return self.keys[task_id]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            for key in chunk:
+                yield key[-1]
+
+
+def make_search_index(kind):
+    """Return an empty search index of the given kind ("word" or "trigram")."""
+    if kind == "word":
+        return WordIndex()
+    if kind == "trigram":
+        return TrigramIndex()
+    raise ValueError(f"Unknown search index: {kind}")
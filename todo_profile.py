@@ -0,0 +1,140 @@
+"""
+Lightweight timing instrumentation for the To-Do List Manager.
+- Profiler times named operations (add_task, refresh_task_list, ...) with perf_counter and
+  keeps a RollingHistogram of the most recent durations of each.
+- profile_next(name) arms cProfile for the next call of one operation and dumps its
+  pstats output to a .prof file, with the top entries as text for display.
+- Nothing here imports tkinter; todo_app shows the report in its debug panel (F12).
+- record() may also be called from a worker thread (TaskStore's background writer); the
+  readers below copy the histogram table before iterating it.
+"""
+
+import cProfile
+import io
+import pstats
+from bisect import bisect_right
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+ROLLING_SAMPLES = 500   # durations kept per operation
+BUCKET_BOUNDS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)   # histogram bucket upper bounds
+PSTATS_LINES = 25       # entries of the cProfile report kept as text
+
+
+class RollingHistogram:
+    """Durations (seconds) of the last ROLLING_SAMPLES calls, bucketed by BUCKET_BOUNDS_MS,
+    plus lifetime call count and total."""
+
+    def __init__(self, size=ROLLING_SAMPLES):
+        self.samples = deque(maxlen=size)
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)   # the last bucket is "slower than all bounds"
+        self.count = 0
+        self.total = 0.0
+
+    @staticmethod
+    def bucket(seconds):
+        return bisect_right(BUCKET_BOUNDS_MS, seconds * 1000)
+
+    def add(self, seconds):
+        if len(self.samples) == self.samples.maxlen:
+            self.buckets[self.bucket(self.samples[0])] -= 1
+        self.samples.append(seconds)
+        self.buckets[self.bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, q):
+        """Nearest-rank percentile (q in 0..100) of the rolling window, in seconds."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))]
+
+    def snapshot(self):
+        return {"count": self.count, "total_s": self.total, "last_s": self.samples[-1] if self.samples else 0.0,
+                "p50_s": self.percentile(50), "p90_s": self.percentile(90), "p99_s": self.percentile(99),
+                "max_s": max(self.samples, default=0.0), "buckets": list(self.buckets)}
+
+
+class Profiler:
+    """Named timers. Disabled, measure() and wrap() cost one attribute check per call."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}   # operation name -> RollingHistogram
+        self.armed = None      # (name, path) for profile_next
+        self.last_profile = None   # (name, path, top entries as text) of the last cProfile run
+
+    def record(self, name, seconds):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = RollingHistogram()
+        hist.add(seconds)
+
+    @contextmanager
+    def measure(self, name):
+        if not self.enabled:
+            yield
+            return
+        profile = None
+        if self.armed is not None and self.armed[0] == name:
+            path = self.armed[1]
+            self.armed = None
+            profile = cProfile.Profile()
+            profile.enable()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, perf_counter() - start)
+            if profile is not None:
+                profile.disable()
+                self._dump(name, profile, path)
+
+    def wrap(self, name, fn):
+        """Return fn timed under name."""
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            if self.armed is not None:
+                with self.measure(name):
+                    return fn(*args, **kwargs)
+            # the common case, without the context manager's generator overhead
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, perf_counter() - start)
+        return timed
+
+    def profile_next(self, name, path):
+        """Run the next call of operation name under cProfile and dump its stats to path."""
+        self.armed = (name, path)
+
+    def _dump(self, name, profile, path):
+        profile.dump_stats(str(path))
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(PSTATS_LINES)
+        self.last_profile = (name, path, out.getvalue())
+
+    def snapshot(self):
+        return {name: hist.snapshot() for name, hist in list(self.histograms.items())}
+
+    def report(self):
+        """A text table of every operation's timings (milliseconds) and histogram buckets."""
+        bounds = [f"<{b:g}" for b in BUCKET_BOUNDS_MS] + [f">={BUCKET_BOUNDS_MS[-1]:g}"]
+        lines = [f"{'operation':<20}{'calls':>7}{'last':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)",
+                 ""]
+        names = sorted(self.histograms)
+        for name in names:
+            s = self.histograms[name].snapshot()
+            lines.append(f"{name:<20}{s['count']:>7}" + "".join(
+                f"{s[k] * 1000:>9.2f}" for k in ("last_s", "p50_s", "p90_s", "p99_s", "max_s")))
+        lines += ["", f"{'recent calls (ms)':<20}" + " ".join(bounds)]
+        for name in names:
+            lines.append(f"{name:<20}" + " ".join(f"{n:>{len(b)}}" for n, b in
+                                                  zip(self.histograms[name].buckets, bounds)))
+        return "\n".join(lines)
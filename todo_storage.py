@@ -0,0 +1,784 @@
+"""
+Storage engines for the To-Do List Manager.
+- JsonStorage rewrites the whole todo_data.json snapshot on every save (the original behaviour).
+  A snapshot is written to a temporary file, fsynced and renamed over the old one, which
+  is kept (hard-linked) as the newest of a few rotated backups; load falls back to the
+  newest backup that still parses.
+- Every engine can also stream its tasks in batches (iter_load), so a huge file can be
+  shown before it has been read to the end; JsonStream does the incremental parsing.
+- JournalStorage keeps the same snapshot but appends each mutation as one JSON line to a
+  journal file next to it; load replays snapshot + journal, and the journal is folded back
+  into the snapshot once it grows past a threshold (and on exit).
+- SqliteStorage keeps tasks in an SQLite database (WAL mode, indexed) so a mutation is a
+  single-row upsert and list filters can run as SQL (query_ids, for callers without a
+  TaskStore's in-memory indexes); todo_data.json stays the import/export format and is
+  migrated into the database on first use.
+- CompactionPolicy decides when soft-deleted tasks (tombstones) are moved out of the
+  snapshot into a cold archive file (see JsonStorage.compact).
+- IdAllocator hands out task ids from a "next_id" high-water mark kept in each engine's
+  metadata (the snapshot header, a journal record or the SQLite meta table).
+- BackgroundStorage wraps any engine and does its writes on a writer thread, folding the
+  mutations made within a short window into one write.
+"""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+JOURNAL_CHECKPOINT = 5000   # journaled task versions and meta values before they are folded into the snapshot
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"   # same format as a task's "created" field
+
+# Compaction triggers; any one of them is enough. None disables a trigger.
+COMPACT_MAX_TOMBSTONES = 500   # tombstone count
+COMPACT_MAX_RATIO = 0.25       # tombstones / all records, once at least COMPACT_MIN_TOMBSTONES exist
+COMPACT_MIN_TOMBSTONES = 20
+COMPACT_MAX_AGE_DAYS = 30      # oldest tombstone age
+
+SNAPSHOT_BACKUPS = 3   # previous snapshots kept as todo_data.json.1 (newest) .. .3
+WRITE_COALESCE_SECONDS = 0.2   # BackgroundStorage: how long the writer waits for more changes
+LOAD_BATCH = 500          # tasks per batch yielded by iter_load
+STREAM_CHUNK = 1 << 16    # characters JsonStream reads at a time
+
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+NUMBER_TAIL_RE = re.compile(r"[0-9.eE+-]*")   # what may follow a number that ends at a chunk boundary
+
+
+def batches(iterable, size):
+    """Yield lists of up to size items from iterable."""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+class JsonStream:
+    """Incremental reader for one JSON document in a text file.
+
+    Only the structure the caller walks (the top-level object and the tasks array) is
+    scanned by hand; each value inside it is decoded by json's own raw_decode as soon as
+    enough of the file has been read, so memory holds one chunk plus one value at a time.
+    """
+
+    def __init__(self, f, chunk=STREAM_CHUNK):
+        self.f = f
+        self.chunk = chunk
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.f.read(self.chunk)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """The next non-whitespace character, or '' at the end of the file."""
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON stream")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # most likely cut off by the chunk boundary; read on, or give up at the end
+                if self._fill():
+                    continue
+                raise
+            # a number cut by the chunk boundary ("12" of "123", "1" of "1.5" cut after the
+            # dot) decodes fine but may continue in the next chunk
+            if NUMBER_TAIL_RE.fullmatch(self.buf, end) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Decode the elements of the array starting here one by one."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() != ',':
+                self.expect(']')
+                return
+            self.pos += 1
+
+TASK_FIELDS = ("id", "text", "priority", "due_date", "completed", "created", "deleted", "deleted_at")
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+
+class JsonStorage:
+    """Whole-file JSON snapshot: every save re-serializes every task."""
+    incremental = False
+
+    def __init__(self, path, backups=SNAPSHOT_BACKUPS):
+        self.path = Path(path)
+        self.archive_path = self.path.with_name(self.path.stem + "_archive.jsonl")
+        self.backups = backups
+        self.meta = {}
+        self.recovered_from = None   # the backup load() fell back to, if the snapshot was unreadable
+        self._damaged = False        # the snapshot on disk is unreadable (set aside by the next save)
+
+    def backup_path(self, n):
+        return self.path.with_name(f"{self.path.name}.{n}")
+
+    @property
+    def tmp_path(self):
+        return self.path.with_name(self.path.name + ".tmp")
+
+    def load(self):
+        """Read the snapshot, or the newest backup that parses if it is missing or damaged."""
+        self.recovered_from = None
+        self._damaged = False
+        if not self.path.exists() and self.tmp_path.exists():
+            self.finish_interrupted_save()
+        candidates = [self.path] + [self.backup_path(n) for n in range(1, self.backups + 1)]
+        existing = [p for p in candidates if p.exists()]
+        if not existing:
+            return []
+        error = None
+        for path in existing:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:   # UnicodeDecodeError is a ValueError
+                error = error or e
+                continue
+            if path != self.path:
+                self.recovered_from = path
+                self._damaged = self.path.exists()
+            # files written before the metadata header existed are a bare list of tasks
+            if isinstance(data, list):
+                return data
+            self.meta = data.get('meta', {})
+            return data.get('tasks', [])
+        raise error
+
+    def finish_interrupted_save(self):
+        """Rename a complete .tmp snapshot into place; only a crash in save_all leaves one without a snapshot."""
+        try:
+            with open(self.tmp_path, 'r', encoding='utf-8') as f:
+                json.load(f)
+        except (OSError, ValueError):
+            return   # cut off before it was fsynced: the backups are all there is
+        os.replace(self.tmp_path, self.path)
+        self.sync_dir()
+
+    def iter_load(self, batch_size=LOAD_BATCH):
+        """Yield the tasks load() would return in batches, parsing the snapshot as it goes.
+
+        Raises ValueError on a damaged snapshot, possibly after some batches; load() is the
+        path that falls back to the backups.
+        """
+        if not self.path.exists():
+            yield from batches(self.load(), batch_size)
+            return
+        self.recovered_from = None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            stream = JsonStream(f)
+            if stream.peek() == '[':
+                yield from batches(stream.items(), batch_size)
+                return
+            self.meta = {}
+            stream.expect('{')
+            while stream.peek() != '}':
+                key = stream.value()
+                stream.expect(':')
+                if key == 'tasks' and stream.peek() == '[':
+                    yield from batches(stream.items(), batch_size)
+                else:
+                    value = stream.value()
+                    if key == 'meta':
+                        self.meta = value
+                if stream.peek() != ',':
+                    break
+                stream.pos += 1
+            stream.expect('}')
+
+    def save_all(self, tasks):
+        # Write beside the snapshot and rename over it, so a crash leaves either the old or
+        # the new file in place, never a truncated one.
+        tmp = self.tmp_path
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"meta": self.meta, "tasks": tasks}, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        self.rotate_backups()
+        os.replace(tmp, self.path)
+        self.sync_dir()
+
+    def rotate_backups(self):
+        """Shift .1 -> .2 -> ... and hard-link the current snapshot as .1.
+
+        The snapshot keeps its own name until the new one is renamed over it, so a crash
+        in between still leaves a todo_data.json to load.
+        """
+        if not self.path.exists():
+            return
+        if self._damaged:
+            # keep the unreadable file for inspection, but out of the rotation
+            self.link(self.path, self.path.with_name(self.path.name + ".damaged"))
+            self._damaged = False
+            return
+        if not self.backups:
+            return
+        for n in range(self.backups - 1, 0, -1):
+            if self.backup_path(n).exists():
+                os.replace(self.backup_path(n), self.backup_path(n + 1))
+        self.link(self.path, self.backup_path(1))
+
+    @staticmethod
+    def link(src, dst):
+        """Make dst a second name for src, or a copy where the file system has no hard links."""
+        if os.path.lexists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    def sync_dir(self):
+        # make the renames themselves durable; directories cannot be opened on Windows
+        if os.name != 'posix':
+            return
+        fd = os.open(self.path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def set_meta(self, key, value):
+        """Record a metadata value; a plain JSON file writes it with the next snapshot."""
+        self.meta[key] = value
+
+    def append(self, changed):
+        raise NotImplementedError("JsonStorage only supports full snapshots")
+
+    def needs_checkpoint(self):
+        return False
+
+    def checkpoint(self, tasks):
+        """Bring the data file fully up to date (called on exit)."""
+        self.save_all(tasks)
+
+    def query_ids(self, filter_name, search):
+        """Ordered ids of the visible tasks read from the data file, or None if the engine cannot filter.
+
+        TaskStore answers from its indexes instead; this is for scripts that do not load one.
+        """
+        return None
+
+    def compact(self, live, tombstones):
+        """Append tombstones to the archive file, then rewrite the snapshot with live tasks only."""
+        # Archive first: a crash in between leaves a task in both files, never in neither.
+        if tombstones:
+            with open(self.archive_path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(t, ensure_ascii=False) + "\n" for t in tombstones))
+        self.save_all(live)
+
+    def close(self):
+        pass
+
+
+class JournalStorage(JsonStorage):
+    """Snapshot + append-only journal: a mutation costs one appended line, not a full rewrite."""
+    incremental = True
+
+    def __init__(self, path, journal_path=None, checkpoint_every=JOURNAL_CHECKPOINT):
+        super().__init__(path)
+        self.journal_path = Path(journal_path) if journal_path else self.path.with_suffix('.journal')
+        self.checkpoint_every = checkpoint_every
+        self.journal_records = 0
+        self._journal = None
+
+    def load(self):
+        tasks = super().load()
+        position = {t.get('id'): i for i, t in enumerate(tasks)}
+        for task in self.replay():
+            i = position.get(task.get('id'))
+            if i is None:
+                position[task.get('id')] = len(tasks)
+                tasks.append(task)
+            else:
+                tasks[i] = task
+        return tasks
+
+    def iter_load(self, batch_size=LOAD_BATCH):
+        # a journaled task simply comes again later; the consumer keeps the last version
+        yield from super().iter_load(batch_size)
+        yield from batches(self.replay(), batch_size)
+
+    def replay(self):
+        """Yield the task of every put record in the journal, applying meta records on the way."""
+        self.journal_records = 0
+        if not self.journal_path.exists():
+            return
+
+        good_end = 0
+        torn = False
+        with open(self.journal_path, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    torn = True
+                    break
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    torn = True
+                    break
+                good_end += len(raw)
+                self.journal_records += self.record_size(rec)
+                if rec.get('op') == 'meta':
+                    self.meta[rec.get('key')] = rec.get('value')
+                    continue
+                task = rec.get('task')
+                if rec.get('op') == 'put' and task:
+                    yield task
+                elif rec.get('op') == 'puts':
+                    yield from rec.get('tasks') or ()
+        if torn:
+            # A crash mid-append leaves a partial last line; drop it so new records
+            # are not written after garbage that would stop the next replay.
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_end)
+
+    def append(self, changed):
+        if len(changed) == 1:
+            self._write([{"op": "put", "task": changed[0]}])
+        elif changed:
+            # several tasks changed together go in one line, so a torn write loses all or none of them
+            self._write([{"op": "puts", "tasks": changed}])
+
+    def set_meta(self, key, value):
+        super().set_meta(key, value)
+        self._write([{"op": "meta", "key": key, "value": value}])
+
+    def _write(self, records):
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._journal.write("".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in records))
+        self._journal.flush()
+        self.journal_records += sum(self.record_size(rec) for rec in records)
+
+    @staticmethod
+    def record_size(rec):
+        # a "puts" line counts once per task, so batching does not postpone checkpoints
+        return len(rec.get('tasks') or ()) if rec.get('op') == 'puts' else 1
+
+    def needs_checkpoint(self):
+        return self.journal_records >= self.checkpoint_every
+
+    def save_all(self, tasks):
+        super().save_all(tasks)
+        # the snapshot now holds everything the journal described
+        self.close()
+        with open(self.journal_path, 'w', encoding='utf-8'):
+            pass
+        self.journal_records = 0
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class SqliteStorage(JsonStorage):
+    """SQLite database: one row per task, single-row upserts, filters pushed down as SQL."""
+    incremental = True
+
+    def __init__(self, path, json_path=None):
+        super().__init__(path)
+        self.json_path = Path(json_path) if json_path else self.path.with_suffix('.json')
+        self.archive_path = self.json_path.with_name(self.json_path.stem + "_archive.jsonl")
+        # BackgroundStorage writes from its own thread; it serializes every use of the connection
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        # Python's str.lower so search keeps the same (unicode-aware) semantics as in memory
+        self.conn.create_function("pylower", 1, lambda s: (s or '').lower(), deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                text TEXT, priority TEXT, due_date TEXT, completed INTEGER NOT NULL DEFAULT 0,
+                created TEXT, deleted INTEGER NOT NULL DEFAULT 0, deleted_at TEXT,
+                extra TEXT)""")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            for col in ("priority", "completed", "deleted", "due_date"):
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_tasks_{col} ON tasks({col})")
+
+    @staticmethod
+    def _to_row(t):
+        # unknown keys ride along in "extra" so the JSON round-trip stays lossless
+        extra = {k: v for k, v in t.items() if k not in TASK_FIELDS}
+        return (t.get('id'), t.get('text'), t.get('priority'), t.get('due_date'),
+                int(bool(t.get('completed'))), t.get('created'), int(bool(t.get('deleted'))),
+                t.get('deleted_at'), json.dumps(extra, ensure_ascii=False) if extra else None)
+
+    @staticmethod
+    def _from_row(row):
+        t = {"id": row[0], "text": row[1], "priority": row[2], "due_date": row[3],
+             "completed": bool(row[4]), "created": row[5], "deleted": bool(row[6])}
+        if row[7] is not None:
+            t["deleted_at"] = row[7]
+        if row[8]:
+            t.update(json.loads(row[8]))
+        return t
+
+    def load(self):
+        return [t for batch in self.iter_load() for t in batch]
+
+    def iter_load(self, batch_size=LOAD_BATCH):
+        self.meta = {k: json.loads(v) for k, v in self.conn.execute("SELECT key, value FROM meta")}
+        if "migrated" not in self.meta:
+            self.migrate_from_json()
+        cur = self.conn.execute("SELECT id, text, priority, due_date, completed, created, deleted, "
+                                "deleted_at, extra FROM tasks ORDER BY seq")
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [self._from_row(row) for row in rows]
+
+    def migrate_from_json(self):
+        """One-shot import of todo_data.json (plus any journal) into an empty database."""
+        with self.conn:
+            if self.json_path.exists() and not self.conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone():
+                source = JournalStorage(self.json_path)
+                self._upsert(source.load())
+                for key, value in source.meta.items():
+                    self._put_meta(key, value)
+                self.meta.update(source.meta)
+            self._put_meta("migrated", self.json_path.name)
+            self.meta["migrated"] = self.json_path.name
+
+    def export_json(self, path=None):
+        """Write every task to a JSON file in the todo_data.json format."""
+        out = JsonStorage(path or self.json_path)
+        tasks = self.load()
+        out.meta = dict(self.meta)
+        out.save_all(tasks)
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self._put_meta(key, value)
+        self.meta[key] = value
+
+    def _put_meta(self, key, value):
+        self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                          "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+
+    def _upsert(self, tasks):
+        self.conn.executemany(
+            "INSERT INTO tasks (id, text, priority, due_date, completed, created, deleted, deleted_at, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+            "text = excluded.text, priority = excluded.priority, due_date = excluded.due_date, "
+            "completed = excluded.completed, created = excluded.created, deleted = excluded.deleted, "
+            "deleted_at = excluded.deleted_at, extra = excluded.extra",
+            [self._to_row(t) for t in tasks])
+
+    def append(self, changed):
+        with self.conn:
+            self._upsert(changed)
+
+    def save_all(self, tasks):
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks")
+            self._upsert(tasks)
+
+    def checkpoint(self, tasks):
+        # every change is already committed; just fold the WAL back into the database
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def compact(self, live, tombstones):
+        if tombstones:
+            with open(self.archive_path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(t, ensure_ascii=False) + "\n" for t in tombstones))
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks WHERE deleted = 1")
+
+    def query_ids(self, filter_name, search):
+        where, args = ["deleted = 0"], []
+        if filter_name == "Pending":
+            where.append("completed = 0")
+        elif filter_name == "Completed":
+            where.append("completed = 1")
+        elif filter_name.endswith("Priority"):
+            where.append("priority = ?")
+            args.append(filter_name.split()[0])
+        if search:
+            where.append("instr(pylower(text), ?) > 0")
+            args.append(search)
+        rank = " ".join(f"WHEN '{p}' THEN {r}" for p, r in PRIORITY_RANK.items())
+        sql = (f"SELECT id FROM tasks WHERE {' AND '.join(where)} "
+               f"ORDER BY completed, CASE priority {rank} ELSE 1 END, "
+               f"COALESCE(NULLIF(due_date, ''), '9999-12-31'), COALESCE(created, ''), length(id), id")
+        return [row[0] for row in self.conn.execute(sql, args)]
+
+    def close(self):
+        self.conn.close()
+
+
+class BackgroundStorage:
+    """Write-behind wrapper: same interface as the engine it wraps, but writes are queued
+    and carried out by a writer thread.
+
+    Queued changes are coalesced: every put and metadata value recorded before the writer
+    wakes up goes out as one append (the latest version of each task wins) and a full
+    save_all supersedes the puts queued before it. compact and checkpoint keep their place
+    in the queue. A failed write is kept in self.errors for the caller to collect with
+    take_errors(); close() flushes the queue and raises the first error it left behind.
+    If given, timer(name, seconds) is called on the writer thread after each write.
+    """
+
+    def __init__(self, storage, delay=WRITE_COALESCE_SECONDS, timer=None):
+        self.storage = storage
+        self.delay = delay
+        self.timer = timer
+        self.errors = deque()
+        self._queue = deque()   # batches (dicts, see _batch) and ("compact"|"checkpoint", ...) tuples
+        self._busy = False      # the writer is carrying out items it took off the queue
+        self._flush = False     # someone is waiting in flush(): skip the coalescing wait
+        self._closing = False
+        self._cond = threading.Condition()
+        self._io = threading.Lock()   # held around every call into the wrapped engine
+        self._thread = None
+
+    @property
+    def incremental(self):
+        return self.storage.incremental
+
+    @property
+    def meta(self):
+        return self.storage.meta
+
+    @property
+    def archive_path(self):
+        return self.storage.archive_path
+
+    @property
+    def recovered_from(self):
+        return self.storage.recovered_from
+
+    def load(self):
+        with self._io:
+            return self.storage.load()
+
+    def iter_load(self, batch_size=LOAD_BATCH):
+        it = self.storage.iter_load(batch_size)
+        while True:
+            with self._io:
+                batch = next(it, None)
+            if batch is None:
+                return
+            yield batch
+
+    def _batch(self):
+        # caller holds self._cond
+        if not self._queue or not isinstance(self._queue[-1], dict):
+            self._queue.append({"meta": {}, "tasks": None, "puts": {}})
+        return self._queue[-1]
+
+    def _submit(self, fill):
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("storage is closed")
+            fill()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="todo-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def append(self, changed):
+        def fill():
+            puts = self._batch()["puts"]
+            for t in changed:
+                puts[t.get('id')] = t
+        self._submit(fill)
+
+    def save_all(self, tasks):
+        def fill():
+            batch = self._batch()
+            batch["tasks"] = tasks
+            batch["puts"].clear()
+        self._submit(fill)
+
+    def set_meta(self, key, value):
+        self._submit(lambda: self._batch()["meta"].__setitem__(key, value))
+
+    def needs_checkpoint(self):
+        return self.storage.needs_checkpoint()
+
+    def checkpoint(self, tasks):
+        self._submit(lambda: self._queue.append(("checkpoint", tasks)))
+
+    def compact(self, live, tombstones):
+        self._submit(lambda: self._queue.append(("compact", live, tombstones)))
+
+    def query_ids(self, filter_name, search):
+        with self._cond:
+            if self._queue or self._busy:
+                # the engine is behind the in-memory tasks; let the caller filter those
+                return None
+        with self._io:
+            return self.storage.query_ids(filter_name, search)
+
+    def take_errors(self):
+        """Return and forget the write errors collected so far."""
+        errors = []
+        while self.errors:
+            errors.append(self.errors.popleft())
+        return errors
+
+    def flush(self):
+        """Block until every queued write has been carried out."""
+        with self._cond:
+            self._flush = True
+            self._cond.notify_all()
+            while self._queue or self._busy:
+                self._cond.wait()
+            self._flush = False
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        with self._io:
+            self.storage.close()
+        if self.errors:
+            raise self.errors.popleft()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = time.monotonic() + self.delay
+                while not (self._flush or self._closing):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                items = list(self._queue)
+                self._queue.clear()
+                self._busy = True
+            try:
+                with self._io:
+                    for item in items:
+                        started = time.perf_counter()
+                        try:
+                            self._write(item)
+                        except Exception as e:
+                            self.errors.append(e)
+                        if self.timer is not None:
+                            self.timer("save.write", time.perf_counter() - started)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, item):
+        if isinstance(item, tuple):
+            if item[0] == "compact":
+                self.storage.compact(item[1], item[2])
+            else:
+                self.storage.checkpoint(item[1])
+            return
+        for key, value in item["meta"].items():
+            self.storage.set_meta(key, value)
+        if item["tasks"] is not None:
+            self.storage.save_all(item["tasks"])
+        if item["puts"]:
+            self.storage.append(list(item["puts"].values()))
+
+
+class CompactionPolicy:
+    """Decides when tombstones should be purged from the data file by compaction."""
+
+    def __init__(self, max_tombstones=COMPACT_MAX_TOMBSTONES, max_ratio=COMPACT_MAX_RATIO,
+                 max_age_days=COMPACT_MAX_AGE_DAYS, min_tombstones=COMPACT_MIN_TOMBSTONES):
+        self.max_tombstones = max_tombstones
+        self.max_ratio = max_ratio
+        self.max_age_days = max_age_days
+        self.min_tombstones = min_tombstones
+
+    def should_compact(self, live_count, deleted_at, now=None):
+        """deleted_at holds the "deleted_at" timestamp (or None) of every tombstone."""
+        n = len(deleted_at)
+        if not n:
+            return False
+        if self.max_tombstones is not None and n >= self.max_tombstones:
+            return True
+        if self.max_ratio is not None and n >= self.min_tombstones and n / (n + live_count) >= self.max_ratio:
+            return True
+        if self.max_age_days is not None:
+            cutoff = ((now or datetime.now()) - timedelta(days=self.max_age_days)).strftime(TIMESTAMP_FORMAT)
+            # tombstones written before "deleted_at" existed have no age and count as old
+            return any((stamp or '') <= cutoff for stamp in deleted_at)
+        return False
+
+
+class IdAllocator:
+    """Monotonic task ids from a persisted high-water mark; an id is never handed out twice,
+    even after the task that held the highest id has been compacted away."""
+
+    def __init__(self, storage, task_ids=()):
+        self.storage = storage
+        next_id = storage.meta.get('next_id')
+        if next_id is None:
+            # data written before the allocator existed: derive the mark once from the ids present
+            next_id = 1 + max((int(i) for i in task_ids if str(i).isdigit()), default=0)
+        self.next_id = int(next_id)
+
+    def allocate(self):
+        return self.reserve(1)[0]
+
+    def reserve(self, count):
+        """Reserve count consecutive ids (e.g. for a bulk import) with a single metadata write."""
+        start = self.next_id
+        self.next_id += count
+        self.storage.set_meta('next_id', self.next_id)
+        return range(start, self.next_id)
+
+
+def make_storage(kind, path):
+    """Return the storage engine named by kind ("json", "journal" or "sqlite") for the data file at path."""
+    if kind == "json":
+        return JsonStorage(path)
+    if kind == "journal":
+        return JournalStorage(path)
+    if kind == "sqlite":
+        return SqliteStorage(Path(path).with_suffix('.db'), json_path=path)
+    raise ValueError(f"Unknown storage backend: {kind}")
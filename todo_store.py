@@ -0,0 +1,364 @@
+"""
+Headless task model for the To-Do List Manager.
+- TaskStore owns the tasks, their persistence (todo_storage engines) and every index
+  (todo_index, todo_columns), and answers the task list's filter/search queries.
+- It does not import tkinter, so it can be scripted, tested and profiled without a display;
+  TodoApp in todo_app.py is a Tk front end over one TaskStore.
+- Methods raise on storage errors; the caller decides how to report them. With
+  background=True writes happen on a writer thread instead (todo_storage.BackgroundStorage)
+  and their errors are collected with write_errors().
+- With a todo_profile.Profiler, persist() and save() are timed on the calling thread and
+  each background write as "save.write" on the writer thread.
+- begin_load() reads the data file on a loader thread instead of all at once; load_some()
+  indexes whatever has been parsed so far, so a front end can show the first tasks early.
+- Every mutation takes a list of tasks and is one transaction: one storage write and one
+  undo entry, however many tasks it touches; undo() reverts the latest one.
+"""
+
+import queue
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+
+from todo_columns import ColumnarTasks, matches
+from todo_index import FilterBuckets, SortedTasks, TaskStats, make_search_index
+from todo_profile import Profiler
+from todo_storage import (BackgroundStorage, CompactionPolicy, IdAllocator, LOAD_BATCH, TIMESTAMP_FORMAT,
+                          make_storage)
+from todo_task import Task
+
+UNDO_DEPTH = 50   # mutations that can be undone
+
+
+class TaskStore:
+    def __init__(self, data_file, backend="journal", search_index="trigram", columnar=False, compaction=None,
+                 background=False, profiler=None):
+        self.profiler = profiler or Profiler(enabled=False)
+        self.storage = make_storage(backend, data_file)
+        if background:
+            self.storage = BackgroundStorage(self.storage,
+                                             timer=self.profiler.record if self.profiler.enabled else None)
+        self.compaction = compaction or CompactionPolicy()
+        self.search_index_kind = search_index
+        self.columnar = columnar
+        self.loading = False   # True between begin_load() and the last batch
+        # (label, [(task id, task dict before the change, or None if it was added)]) per mutation
+        self.undo_stack = deque(maxlen=UNDO_DEPTH)
+        # empty (but fully indexed) until load()
+        self.load_records([])
+
+    def load(self):
+        """Read the data file and rebuild every index; raises if neither it nor a backup can be read."""
+        self.load_records(self.storage.load())
+
+    @property
+    def recovered_from(self):
+        """Path of the backup the last load() fell back to, or None."""
+        return self.storage.recovered_from
+
+    def load_records(self, records):
+        """Replace the tasks with records (dicts in the todo_data.json schema)."""
+        tasks = [Task.from_dict(d) for d in records]
+        self.tombstones = [t for t in tasks if t.deleted]   # kept out of self.tasks until compaction
+        self.tasks = [t for t in tasks if not t.deleted]
+        self.ids = IdAllocator(self.storage, [t.id for t in tasks])
+        self.reindex()
+
+    def begin_load(self, batch_size=LOAD_BATCH):
+        """Start reading the data file on a loader thread; call load_some() to take in its batches."""
+        self.load_records([])
+        self.loading = True
+        self._loaded = {}                 # task id -> latest version read, tombstones included
+        self._batches = queue.Queue()     # lists of Tasks, then None (done) or the exception raised
+        threading.Thread(target=self._read_batches, args=(batch_size,), name="todo-loader", daemon=True).start()
+
+    def _read_batches(self, batch_size):
+        try:
+            for batch in self.storage.iter_load(batch_size):
+                self._batches.put([Task.from_dict(d) for d in batch])
+        except Exception as e:
+            self._batches.put(e)
+            return
+        self._batches.put(None)
+
+    def load_some(self, wait=False, max_tasks=None):
+        """Index the batches read so far (waiting for one first if wait); True while more are to come.
+
+        Re-raises a loader error, after which the store is left empty and not loading.
+        """
+        taken = 0
+        while self.loading and (max_tasks is None or taken < max_tasks):
+            try:
+                batch = self._batches.get(block=wait)
+            except queue.Empty:
+                break
+            wait = False
+            if batch is None:
+                self._end_load()
+            elif isinstance(batch, Exception):
+                self.loading = False
+                self.load_records([])
+                raise batch
+            else:
+                self._take(batch)
+                taken += len(batch)
+        return self.loading
+
+    def finish_load(self):
+        """Block until a load started by begin_load() has been taken in completely."""
+        while self.load_some(wait=True):
+            pass
+
+    def _take(self, batch):
+        # a later version of a task (a journal record) replaces the one taken in before
+        for t in batch:
+            old = self._loaded.get(t.id)
+            if old is not None and not old.deleted:
+                self.unindex_task(old)
+            self._loaded[t.id] = t
+            if t.deleted:
+                self.task_index.pop(t.id, None)
+            else:
+                self.task_index[t.id] = t
+                self.index_task(t)
+
+    def _end_load(self):
+        tasks = list(self._loaded.values())
+        self._loaded = None
+        self.tombstones = [t for t in tasks if t.deleted]
+        self.tasks = [t for t in tasks if not t.deleted]
+        self.ids = IdAllocator(self.storage, [t.id for t in tasks])
+        self.loading = False
+
+    def reindex(self):
+        """Rebuild the id index and every derived structure from self.tasks."""
+        self.task_index = {t.id: t for t in self.tasks}
+        if len(self.task_index) != len(self.tasks):
+            # duplicate ids (hand-edited file): keep the last copy, as a journal replay would
+            self.tasks = list(self.task_index.values())
+        self.search_index = make_search_index(self.search_index_kind)
+        for t in self.tasks:
+            self.search_index.add(t.id, t.text)
+        self.stats = TaskStats(self.tasks)
+        self.filters = FilterBuckets(self.tasks)
+        self.order = SortedTasks(self.tasks)
+        self.columns = ColumnarTasks(self.tasks) if self.columnar else None
+
+    def index_task(self, t):
+        """Add t to the search index, stats, filter buckets, sort order and columns (after creating or changing it)."""
+        self.search_index.add(t.id, t.text)
+        self.stats.add(t)
+        self.filters.add(t)
+        self.order.add(t)
+        if self.columns is not None:
+            self.columns.add(t)
+
+    def unindex_task(self, t):
+        """Take t out of the derived structures; call before changing or deleting it."""
+        self.search_index.remove(t.id)
+        self.stats.remove(t)
+        self.filters.remove(t)
+        self.order.remove(t)
+        if self.columns is not None:
+            self.columns.remove(t)
+
+    # queries
+
+    def get(self, task_id):
+        return self.task_index.get(task_id)
+
+    def get_many(self, task_ids):
+        """The live tasks among task_ids, in display order (the selection's bulk actions)."""
+        tasks = [t for t in map(self.task_index.get, task_ids) if t is not None]
+        if len(tasks) > 1:
+            tasks.sort(key=lambda t: self.order.key_of(t.id))
+        return tasks
+
+    def count(self, **criteria):
+        """Number of live tasks matching criteria (completed, priority, due_before, due_from;
+        see ColumnarTasks.mask), from the columns when the store keeps them."""
+        if self.columns is not None:
+            return self.columns.count(**criteria)
+        return sum(1 for t in self.tasks if matches(t, **criteria))
+
+    def select(self, **criteria):
+        """Live tasks matching criteria (as for count), in display order."""
+        if self.columns is not None:
+            ids = self.columns.select_ids(**criteria)
+        else:
+            ids = [t.id for t in self.tasks if matches(t, **criteria)]
+        return self.get_many(ids)
+
+    def completed_tasks(self):
+        return [self.task_index[i] for i in self.filters.members("Completed")]
+
+    def query(self, filter_name="All", search=""):
+        """Live tasks passing a Filter button and a search string, in display order."""
+        s = search.lower().strip()
+
+        # Always answered from the in-memory indexes, even when the engine could run the
+        # query itself (SqliteStorage.query_ids): they are up to date and a table scan is not.
+        # The filter bucket and the search hits are both id sets; the intersection
+        # only walks the smaller one.
+        ids = self.filters.members(filter_name)
+        matches = self.search_index.search(s) if s else None
+        if matches is not None:
+            ids = matches & ids
+        if s and matches is None:
+            ids = {i for i in ids if s in self.task_index[i].text.lower()}
+
+        if len(ids) < len(self.order) // 8:
+            # a small result is cheaper to sort by its stored keys than to pick out of a full walk
+            ordered = sorted(ids, key=self.order.key_of)
+        else:
+            ordered = (i for i in self.order if i in ids)
+        return [self.task_index[i] for i in ordered]
+
+    # mutations
+
+    def add(self, text, priority="Medium", due_date=None):
+        self.finish_load()
+        task = Task(str(self.ids.allocate()), text, priority, due_date,
+                    created=datetime.now().strftime(TIMESTAMP_FORMAT))
+        self.tasks.append(task)
+        self.task_index[task.id] = task
+        self.index_task(task)
+        self.persist(task)
+        self.undo_stack.append(("Add task", [(task.id, None)]))
+        return task
+
+    def update(self, t, **fields):
+        """Set fields (text, priority, due_date, completed) on task t and persist it."""
+        self.update_many([t], "Edit task", **fields)
+
+    def live(self, tasks):
+        """The tasks that are still the live object for their id (not deleted, not replaced)."""
+        return [t for t in tasks if self.task_index.get(t.id) is t]
+
+    def update_many(self, tasks, label="Edit tasks", **fields):
+        """Set the same fields on every task in tasks, as one write and one undo entry.
+
+        Tasks that are no longer live are skipped.
+        """
+        self.finish_load()
+        tasks = self.live(tasks)
+        if not tasks:
+            return
+        self.undo_stack.append((label, [(t.id, t.to_dict()) for t in tasks]))
+        for t in tasks:
+            self.unindex_task(t)
+            for name, value in fields.items():
+                setattr(t, name, sys.intern(value) if name == 'priority' else value)
+            self.index_task(t)
+        self.persist(*tasks)
+
+    def toggle(self, t):
+        self.update_many([t], "Mark pending" if t.completed else "Mark complete", completed=not t.completed)
+
+    def delete(self, dead):
+        """Soft-delete tasks: move them to the tombstones, persist, and compact if due."""
+        self.finish_load()
+        dead = self.live(dead)
+        if not dead:
+            return
+        self.undo_stack.append((f"Delete {len(dead)} task(s)", [(t.id, t.to_dict()) for t in dead]))
+        deleted_at = datetime.now().strftime(TIMESTAMP_FORMAT)
+        dead_ids = {id(t) for t in dead}
+        self.tasks = [t for t in self.tasks if id(t) not in dead_ids]
+        for t in dead:
+            t.deleted = True
+            t.deleted_at = deleted_at
+            self.task_index.pop(t.id, None)
+            self.unindex_task(t)
+        self.tombstones.extend(dead)
+        self.persist(*dead)
+        self.compact_if_needed()
+
+    def undo(self):
+        """Put every task the latest mutation touched back as it was, in one write; returns its label.
+
+        An added task is deleted again; a deleted one comes back even if compaction has since
+        archived it. Fields are restored in place on the existing Task objects, so references
+        held elsewhere (an open edit dialog) stay valid. Returns None if there is nothing to undo.
+        """
+        self.finish_load()
+        if not self.undo_stack:
+            return None
+        label, before = self.undo_stack.pop()
+        ids = {task_id for task_id, _ in before}
+        current = {t.id: t for t in self.tombstones if t.id in ids}
+        for task_id in ids:
+            t = self.task_index.pop(task_id, None)
+            if t is not None:
+                self.unindex_task(t)
+                current[task_id] = t
+        self.tasks = [t for t in self.tasks if t.id not in ids]
+        self.tombstones = [t for t in self.tombstones if t.id not in ids]
+
+        restored = []
+        deleted_at = datetime.now().strftime(TIMESTAMP_FORMAT)
+        for task_id, state in before:
+            t = current.get(task_id)
+            if state is None:
+                # undoing an add: the task becomes a tombstone like any deleted one
+                state = dict(t.to_dict(), deleted=True, deleted_at=deleted_at)
+            if t is None:
+                # archived by compaction since; nothing refers to it any more
+                t = Task.from_dict(state)
+            else:
+                t.copy_from(Task.from_dict(state))
+            restored.append(t)
+            if t.deleted:
+                self.tombstones.append(t)
+            else:
+                self.tasks.append(t)
+                self.task_index[t.id] = t
+                self.index_task(t)
+        self.persist(*restored)
+        return label
+
+    # persistence
+
+    def records(self):
+        """Every task, live and tombstoned, in the todo_data.json schema the storage engines write."""
+        self.finish_load()
+        return [t.to_dict() for t in self.tasks + self.tombstones]
+
+    def save(self):
+        with self.profiler.measure("save"):
+            self.storage.save_all(self.records())
+
+    def persist(self, *changed):
+        """Persist the changed tasks: one journal record each, or a full rewrite for plain JSON."""
+        with self.profiler.measure("persist"):
+            if not self.storage.incremental:
+                self.save()
+                return
+            self.storage.append([t.to_dict() for t in changed])
+            if self.storage.needs_checkpoint():
+                self.save()
+
+    def compact_if_needed(self):
+        if self.compaction.should_compact(len(self.tasks), [t.deleted_at for t in self.tombstones]):
+            self.compact()
+
+    def compact(self):
+        """Archive all tombstones and rewrite the data file with live tasks only."""
+        self.storage.compact([t.to_dict() for t in self.tasks], [t.to_dict() for t in self.tombstones])
+        self.tombstones = []
+        if self.columns is not None:
+            self.columns.compact()
+
+    def checkpoint(self):
+        """Bring the data file fully up to date (on exit)."""
+        self.storage.checkpoint(self.records())
+
+    def write_errors(self):
+        """Errors from background writes since the last call (always empty without background)."""
+        take = getattr(self.storage, 'take_errors', None)
+        return take() if take else []
+
+    def close(self):
+        """Close the storage engine, after finishing any background writes."""
+        self.storage.close()
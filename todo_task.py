@@ -0,0 +1,114 @@
+"""
+Task record for the To-Do List Manager.
+- Task is a compact __slots__ object for one task, with the due date also kept as an
+  integer date ordinal and the created day pre-split for display.
+- Task.from_dict / Task.to_dict convert to and from the todo_data.json schema without
+  losing anything: keys the app does not know about are carried in Task.extra.
+- build_row formats a task as the values and tags of its row in the task list;
+  VIRTUAL_LIST_MIN_ROWS/VIRTUAL_OVERSCAN say how many of those rows the list builds.
+"""
+
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+INVALID_DATE = 0   # date ordinals start at 1, so 0 marks a due date that does not parse
+SCHEMA = ("id", "text", "priority", "due_date", "completed", "created", "deleted", "deleted_at")
+VIRTUAL_LIST_MIN_ROWS = 2000   # above this many visible tasks only the rows around the viewport are built
+VIRTUAL_OVERSCAN = 10          # extra rows materialized below the viewport in that mode
+
+
+@lru_cache(maxsize=4096)
+def due_ordinal(due):
+    """Return the date ordinal of a YYYY-MM-DD string, None if unset, INVALID_DATE if unparseable."""
+    # distinct due dates are few, so the cache turns nearly every call into a dict hit
+    if not due:
+        return None
+    try:
+        return datetime.strptime(due, "%Y-%m-%d").toordinal()
+    except (TypeError, ValueError):
+        return INVALID_DATE
+
+
+class Task:
+    __slots__ = ("id", "text", "priority", "_due_date", "due_ord", "completed", "created",
+                 "created_day", "deleted", "deleted_at", "extra")
+
+    def __init__(self, id, text, priority="Medium", due_date=None, completed=False, created="",
+                 deleted=False, deleted_at=None, extra=None):
+        self.id = id
+        self.text = text
+        # only three distinct priorities exist; interning makes them all share one string
+        self.priority = sys.intern(priority) if isinstance(priority, str) else priority
+        self.due_date = due_date
+        self.completed = bool(completed)
+        self.created = created
+        self.created_day = sys.intern((created or '').split(' ')[0])
+        self.deleted = bool(deleted)
+        self.deleted_at = deleted_at
+        self.extra = extra
+
+    @property
+    def due_date(self):
+        return self._due_date
+
+    @due_date.setter
+    def due_date(self, value):
+        # like priorities, due dates repeat across many tasks
+        self._due_date = sys.intern(value) if isinstance(value, str) else value
+        self.due_ord = due_ordinal(value)
+
+    @classmethod
+    def from_dict(cls, d):
+        extra = {k: v for k, v in d.items() if k not in SCHEMA} or None
+        return cls(str(d.get('id')), d.get('text', ''), d.get('priority'), d.get('due_date'),
+                   d.get('completed', False), d.get('created', ''), d.get('deleted', False),
+                   d.get('deleted_at'), extra)
+
+    def copy_from(self, other):
+        """Take over every field of other in place, so references to this object stay valid."""
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+
+    def to_dict(self):
+        d = {"id": self.id, "text": self.text, "priority": self.priority, "due_date": self._due_date,
+             "completed": self.completed, "created": self.created, "deleted": self.deleted}
+        if self.deleted_at is not None:
+            d["deleted_at"] = self.deleted_at
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def __repr__(self):
+        return f"Task({self.id!r}, {self.text!r})"
+
+
+def build_row(t, today):
+    """Return the (values, tags) task list row for task t; today is a date ordinal.
+
+    Plain strings only, so the Tk front end and the benchmarks format rows the same way.
+    """
+    due_ord = t.due_ord
+    if due_ord is None:
+        days_left = "N/A"
+    elif due_ord == INVALID_DATE:
+        days_left = "Invalid date"
+    else:
+        delta = due_ord - today
+        days_left = f"{delta} day(s)" if delta >= 0 else f"{abs(delta)} day(s) overdue"
+
+    status = "✓ Done" if t.completed else "Pending"
+    tags = []
+    if t.completed:
+        tags.append('completed')
+    else:
+        if t.priority == 'High':
+            tags.append('high_priority')
+        elif t.priority == 'Medium':
+            tags.append('medium_priority')
+        else:
+            tags.append('low_priority')
+        if due_ord and due_ord < today:
+            tags.append('overdue')
+
+    return (t.id, t.priority, t.text, t.due_date or "No due date", days_left, status, t.created_day), tuple(tags)